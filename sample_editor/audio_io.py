@@ -0,0 +1,369 @@
+"""Memory-mapped reading of uncompressed PCM sources (WAV, W64, AIFF).
+
+Decoding through librosa reads the entire requested region into a fresh
+array. For uncompressed sources audio samples already lay in file as plain
+array, so they can be memory-mapped and converted to float only for the
+block, that is actually processed.
+"""
+import functools
+import os
+from pathlib import Path
+import struct
+import typing as ty
+
+import numpy as np
+
+_W64_GUID_TAIL = bytes.fromhex('f3acd3118cd100c04f8edb8a')
+_W64_RIFF = bytes.fromhex('726966662e91cf11a5d628db04c10000')
+_WAVE_FORMAT_PCM = 0x0001
+_WAVE_FORMAT_IEEE_FLOAT = 0x0003
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class AudioFormatError(Exception):
+    """Raised if file can not be memory-mapped."""
+
+
+class _Layout(ty.NamedTuple):
+    data_offset: int
+    frames: int
+    channels: int
+    samplerate: int
+    sample_width: int
+    is_float: bool
+    big_endian: bool
+    unsigned: bool
+
+
+def _extended_to_float(data: bytes) -> float:
+    """Convert 80-bit IEEE 754 extended (AIFF samplerate) to float."""
+    exponent = ((data[0] & 0x7f) << 8) | data[1]
+    mantissa = int.from_bytes(data[2:10], 'big')
+    value = mantissa * 2.0**(exponent - 16383 - 63)
+    return -value if data[0] & 0x80 else value
+
+
+def _parse_fmt(fmt: bytes) -> ty.Tuple[int, int, int, bool]:
+    tag, channels, samplerate, _, _, bits = struct.unpack('<HHIIHH', fmt[:16])
+    if tag == _WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+        tag = struct.unpack('<H', fmt[24:26])[0]
+    if tag not in (_WAVE_FORMAT_PCM, _WAVE_FORMAT_IEEE_FLOAT):
+        raise AudioFormatError(f'compressed wave format: {tag}')
+    return channels, samplerate, bits // 8, tag == _WAVE_FORMAT_IEEE_FLOAT
+
+
+def _layout_wav(f: ty.BinaryIO, size: int) -> _Layout:
+    fmt: ty.Optional[bytes] = None
+    pos = 12
+    while pos + 8 <= size:
+        f.seek(pos)
+        ch_id, ch_size = struct.unpack('<4sI', f.read(8))
+        if ch_id == b'fmt ':
+            fmt = f.read(ch_size)
+        elif ch_id == b'data':
+            if fmt is None:
+                raise AudioFormatError('data chunk before fmt chunk')
+            channels, sr, width, is_float = _parse_fmt(fmt)
+            return _Layout(
+                pos + 8, ch_size // (width * channels), channels, sr, width,
+                is_float, False, width == 1
+            )
+        pos += 8 + ch_size + (ch_size & 1)
+    raise AudioFormatError('no data chunk')
+
+
+def _layout_w64(f: ty.BinaryIO, size: int) -> _Layout:
+    fmt: ty.Optional[bytes] = None
+    pos = 40
+    while pos + 24 <= size:
+        f.seek(pos)
+        guid = f.read(16)
+        ch_size = struct.unpack('<Q', f.read(8))[0]
+        if ch_size < 24:
+            raise AudioFormatError('broken w64 chunk')
+        if guid[4:] == _W64_GUID_TAIL and guid[:4] == b'fmt ':
+            fmt = f.read(ch_size - 24)
+        elif guid[4:] == _W64_GUID_TAIL and guid[:4] == b'data':
+            if fmt is None:
+                raise AudioFormatError('data chunk before fmt chunk')
+            channels, sr, width, is_float = _parse_fmt(fmt)
+            return _Layout(
+                pos + 24, (ch_size - 24) // (width * channels), channels, sr,
+                width, is_float, False, width == 1
+            )
+        pos += ch_size + (-ch_size % 8)
+    raise AudioFormatError('no data chunk')
+
+
+def _layout_aiff(f: ty.BinaryIO, size: int, is_aifc: bool) -> _Layout:
+    comm: ty.Optional[bytes] = None
+    pos = 12
+    while pos + 8 <= size:
+        f.seek(pos)
+        ch_id, ch_size = struct.unpack('>4sI', f.read(8))
+        if ch_id == b'COMM':
+            comm = f.read(ch_size)
+        elif ch_id == b'SSND':
+            if comm is None:
+                raise AudioFormatError('SSND chunk before COMM chunk')
+            channels, frames, bits = struct.unpack('>hIh', comm[:8])
+            sr = int(round(_extended_to_float(comm[8:18])))
+            big_endian, is_float = True, False
+            if is_aifc:
+                compression = comm[18:22]
+                if compression == b'sowt':
+                    big_endian = False
+                elif compression in (b'fl32', b'FL32', b'fl64', b'FL64'):
+                    is_float = True
+                elif compression != b'NONE':
+                    raise AudioFormatError(
+                        f'compressed aiff format: {compression!r}'
+                    )
+            data_ofst = struct.unpack('>I', f.read(4))[0]
+            return _Layout(
+                pos + 16 + data_ofst, frames, channels, sr, (bits + 7) // 8,
+                is_float, big_endian, False
+            )
+        pos += 8 + ch_size + (ch_size & 1)
+    raise AudioFormatError('no SSND chunk')
+
+
+def _read_layout(filename: str) -> _Layout:
+    size = os.path.getsize(filename)
+    with open(filename, 'rb') as f:
+        header = f.read(16)
+        if header[:4] == b'RIFF' and header[8:12] == b'WAVE':
+            return _layout_wav(f, size)
+        if header == _W64_RIFF:
+            return _layout_w64(f, size)
+        if header[:4] == b'FORM' and header[8:12] in (b'AIFF', b'AIFC'):
+            return _layout_aiff(f, size, header[8:12] == b'AIFC')
+    raise AudioFormatError(f'not an uncompressed PCM file: {filename}')
+
+
+class MappedSource:
+    """Memory-mapped uncompressed PCM audio file.
+
+    Raw samples are never copied entirely: `window` gives read-only view
+    of the file region, and `read` / `iter_blocks` convert it to float
+    and fold to mono block by block.
+
+    Attributes
+    ----------
+    filename : str
+    samplerate : int
+    channels : int
+    frames : int
+        amount of sample frames in file
+    sample_width : int
+        bytes per sample
+    """
+
+    def __init__(self, filename: str) -> None:
+        """
+        Parameters
+        ----------
+        filename : str
+
+        Raises
+        ------
+        AudioFormatError
+            If file is not uncompressed WAV, W64 or AIFF.
+        """
+        self.filename = filename
+        layout = _read_layout(filename)
+        if layout.sample_width not in (1, 2, 3, 4, 8):
+            raise AudioFormatError(f'bad sample width: {layout.sample_width}')
+        self.samplerate = layout.samplerate
+        self.channels = layout.channels
+        self.sample_width = layout.sample_width
+        self._layout = layout
+        block_align = layout.sample_width * layout.channels
+        available = (os.path.getsize(filename) -
+                     layout.data_offset) // block_align
+        self.frames = max(0, min(layout.frames, available))
+        self._map = np.memmap(
+            filename,
+            dtype=np.uint8 if self.sample_width == 3 else self._dtype,
+            mode='r',
+            offset=layout.data_offset,
+            shape=(
+                (self.frames, self.channels, 3)
+                if self.sample_width == 3 else (self.frames, self.channels)
+            ),
+        )
+
+    def __repr__(self) -> str:
+        return (
+            "MappedSource({f}, samplerate={sr}, channels={ch}, frames={fr})"
+        ).format(
+            f=self.filename, sr=self.samplerate, ch=self.channels,
+            fr=self.frames
+        )
+
+    @property
+    def _dtype(self) -> np.dtype:
+        layout = self._layout
+        order = '>' if layout.big_endian else '<'
+        if layout.is_float:
+            return np.dtype(f'{order}f{layout.sample_width}')
+        if layout.unsigned:
+            return np.dtype('u1')
+        return np.dtype(f'{order}i{layout.sample_width}')
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds.
+
+        :type: float
+        """
+        return self.frames / self.samplerate
+
+    def _bounds(self, offset: float,
+                duration: ty.Optional[float]) -> ty.Tuple[int, int]:
+        start = min(self.frames, max(0, int(round(offset * self.samplerate))))
+        if duration is None:
+            return start, self.frames
+        stop = int(round((offset + duration) * self.samplerate))
+        return start, min(self.frames, max(start, stop))
+
+    def window(
+        self,
+        offset: float = 0.0,
+        duration: ty.Optional[float] = None
+    ) -> np.ndarray:
+        """Get read-only raw view of the file region.
+
+        Parameters
+        ----------
+        offset : float, optional
+            in seconds
+        duration : Optional[float], optional
+            in seconds, None means up to the end of file
+
+        Returns
+        -------
+        np.ndarray
+            (frames, channels) of file dtype, or (frames, channels, 3)
+            of bytes for 24-bit files
+        """
+        start, stop = self._bounds(offset, duration)
+        return self._map[start:stop]
+
+    def _to_float(self, raw: np.ndarray, dtype: np.dtype) -> np.ndarray:
+        layout = self._layout
+        dtype = np.dtype(dtype)
+        if self.sample_width == 3:
+            b = raw.astype(np.int32)
+            if layout.big_endian:
+                b = b[..., ::-1]
+            ints = b[..., 0] | (b[..., 1] << 8) | (b[..., 2] << 16)
+            ints = (ints << 8) >> 8
+            return (ints * (1.0 / 2**23)).astype(dtype, copy=False)
+        if layout.is_float:
+            return raw.astype(dtype)
+        if layout.unsigned:
+            return (raw.astype(dtype) - 128) * dtype.type(1 / 128)
+        scale = 1.0 / 2**(8 * self.sample_width - 1)
+        return (raw * scale).astype(dtype, copy=False)
+
+    def iter_blocks(
+        self,
+        offset: float = 0.0,
+        duration: ty.Optional[float] = None,
+        block: int = 65536,
+        mono: bool = True,
+        dtype: np.dtype = np.float32,
+    ) -> ty.Iterator[np.ndarray]:
+        """Iterate over float blocks of the file region.
+
+        Parameters
+        ----------
+        offset : float, optional
+            in seconds
+        duration : Optional[float], optional
+            in seconds, None means up to the end of file
+        block : int, optional
+            block size in frames
+        mono : bool, optional
+            If True — channels are averaged (as librosa does)
+        dtype : np.dtype, optional
+            float32 by default
+
+        Yields
+        ------
+        np.ndarray
+            (frames, ) if mono else (frames, channels)
+        """
+        raw = self.window(offset, duration)
+        for start in range(0, len(raw), block):
+            out = self._to_float(raw[start:start + block], dtype)
+            if mono:
+                out = out.mean(axis=1, dtype=dtype)
+            yield out
+
+    def read(
+        self,
+        offset: float = 0.0,
+        duration: ty.Optional[float] = None,
+        mono: bool = True,
+        dtype: np.dtype = np.float32,
+        block: int = 65536,
+    ) -> np.ndarray:
+        """Read file region to float array.
+
+        Parameters
+        ----------
+        offset : float, optional
+            in seconds
+        duration : Optional[float], optional
+            in seconds, None means up to the end of file
+        mono : bool, optional
+            If True — channels are averaged (as librosa does)
+        dtype : np.dtype, optional
+            float32 by default
+        block : int, optional
+            conversion block size in frames
+
+        Returns
+        -------
+        np.ndarray
+            (frames, ) if mono else (frames, channels)
+        """
+        start, stop = self._bounds(offset, duration)
+        shape = (stop - start, ) if mono else (stop - start, self.channels)
+        out = np.empty(shape, dtype=dtype)
+        pos = 0
+        for chunk in self.iter_blocks(offset, duration, block, mono, dtype):
+            out[pos:pos + len(chunk)] = chunk
+            pos += len(chunk)
+        return out
+
+
+@functools.lru_cache(maxsize=64)
+def _open_mapped(filename: str, mtime_ns: int,
+                 size: int) -> ty.Optional[MappedSource]:
+    try:
+        return MappedSource(filename)
+    except (AudioFormatError, OSError, ValueError, struct.error):
+        return None
+
+
+def open_mapped(filename: str) -> ty.Optional[MappedSource]:
+    """Get MappedSource for file or None if it can't be memory-mapped.
+
+    Parameters
+    ----------
+    filename : str
+
+    Returns
+    -------
+    Optional[MappedSource]
+    """
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    return _open_mapped(
+        str(Path(filename).resolve()), stat.st_mtime_ns, stat.st_size
+    )
@@ -9,10 +9,14 @@ from warnings import warn
 import pickle
 from pprint import pprint
 
+import numpy as np
 import PySimpleGUI as sg
-from .item_handler import ItemsHandler, ItemsError
-from .loop_finder import LoopFinder, LoopSlicer, LoopError
-from .pitch_tracker import estimate_entire_root
+from .item_handler import ItemHandler, ItemsHandler, ItemsError
+from .loop_finder import (
+    LoopFinder, LoopSlicer, LoopError, LoopCandidate, LoopResult, make_loops,
+    get_modulation_period, get_sustain_region
+)
+from .pitch_tracker import PITCH_ENGINES, verify_root
 from .loudness import get_rms, amplitude_to_db
 import reapy_boost as rpr
 
@@ -23,6 +27,10 @@ LayoutType = ty.List[ty.List[sg.Element]]
 ValuesFilledType = ty.Dict[str, ty.Union[str, float, bool]]
 ValuesType = ty.Optional[ValuesFilledType]
 # SerializationType = ty.Dict[str, ty.Union[str, int, float]]
+# seconds, how far loop points can be moved to zero crossings
+SNAP_RADIUS = 0.002
+# how mic tracks are correlated, see LoopFinder
+MICS_COMBINE = {'sum': None, 'min': 'min', 'mean': 'mean'}
 FADE_SHAPES = {
     'flat': 0,
     'smooth up': 1,
@@ -134,53 +142,315 @@ class LoopSlicerGui(GuiMember):
             tooltip='форма кроссфейда',
             auto_size_text=True,
         )
+        self.pyramid = sg.Checkbox(
+            'pyramid',
+            default=False,
+            key=self.key_ns + 'pyramid',
+            tooltip=(
+                'искать на samplerate, уточнять на исходном samplerate'
+                ' (точность до сэмпла)'
+            )
+        )
+        self.periodic = sg.Checkbox(
+            'periodic',
+            default=False,
+            key=self.key_ns + 'periodic',
+            tooltip='длина лупа кратна периоду тремоло'
+        )
+        self.auto_windows = sg.Checkbox(
+            'auto',
+            default=False,
+            key=self.key_ns + 'auto_windows',
+            tooltip=(
+                'искать луп только в сустейне, окна подобрать по его длине'
+                ' (слайдеры — если сустейн не найден)'
+            )
+        )
+        self.snap = sg.Checkbox(
+            'snap',
+            default=False,
+            key=self.key_ns + 'snap',
+            tooltip=(
+                'двигать точки лупа к подходящим переходам через ноль'
+                ' (можно делать кроссфейд короче)'
+            )
+        )
+        self.score_seams = sg.Checkbox(
+            'score',
+            default=False,
+            key=self.key_ns + 'score_seams',
+            tooltip=(
+                'сравнить швы вариантов со всеми формами кроссфейда'
+                ' до изменения проекта'
+            )
+        )
+        self.mics = sg.Combo(
+            list(MICS_COMBINE.keys()),
+            default_value='sum',
+            key=self.key_ns + 'mics',
+            tooltip=(
+                'корреляция по сумме микрофонов, или по каждому'
+                ' (худший / средний)'
+            ),
+            auto_size_text=True,
+        )
+        self.candidates = sg.Spin(
+            list(range(1, 11)),
+            initial_value=5,
+            key=self.key_ns + 'candidates',
+            tooltip='сколько вариантов лупа искать'
+        )
         self.make_loop = sg.Button(
             'make loop', pad=((0, 0), (0, 0)), key=self.key_ns + 'make_loop'
         )
+        self.make_loops = sg.Button(
+            'make loops',
+            pad=((0, 0), (0, 0)),
+            key=self.key_ns + 'make_loops',
+            tooltip='сделать лупы всех выделенных нот'
+        )
+        self.prev_loop = sg.Button(
+            '<',
+            pad=((0, 0), (0, 0)),
+            key=self.key_ns + 'prev_loop',
+            tooltip='предыдущий вариант лупа'
+        )
+        self.next_loop = sg.Button(
+            '>',
+            pad=((0, 0), (0, 0)),
+            key=self.key_ns + 'next_loop',
+            tooltip='следующий вариант лупа'
+        )
+        self.candidate_info = sg.Text('', size=(14, 1))
         self.frame_layout: LayoutType = [
             [self.corr_wind, self.slide_wind, self.cross_length],
             [
                 self.samplerate, self.cross_shape, self.corr_min_treshold,
-                self.corr_max_treshold, self.make_loop
+                self.corr_max_treshold, self.make_loop, self.make_loops
+            ],
+            [
+                self.pyramid, self.periodic, self.auto_windows, self.snap,
+                self.score_seams, self.mics, self.candidates, self.prev_loop,
+                self.next_loop, self.candidate_info
             ],
         ]
+        self._found: ty.List[LoopCandidate] = []
+        # the best fade shape of candidates, if seams were scored
+        self._shapes: ty.Dict[LoopCandidate, int] = {}
+        self._current = 0
+        # time selection and (track, position) of the looped items
+        self._looped: ty.Optional[ty.Tuple[ty.Tuple[float, float], ty.List[
+            ty.Tuple[rpr.Track, float]]]] = None
         self.layout = [[sg.Frame('loop Slicer', self.frame_layout)]]
 
     def read(self, event: str, values: ValuesType) -> ty.Optional[Exception]:
         if not event.startswith(self.key_ns):
             return None
-        if event != self.key_ns + 'make_loop':
-            return None
         assert isinstance(values, ty.Dict)
+        if event == self.key_ns + 'make_loop':
+            return self._make_loop(values)
+        if event == self.key_ns + 'make_loops':
+            return self._make_loops(values)
+        if event == self.key_ns + 'next_loop':
+            return self._step(values, 1)
+        if event == self.key_ns + 'prev_loop':
+            return self._step(values, -1)
+        return None
+
+    def _snap_radius(self, values: ValuesFilledType) -> ty.Optional[float]:
+        return SNAP_RADIUS if values[self.key_ns + 'snap'] else None
+
+    def _make_loop(self, values: ValuesFilledType) -> ty.Optional[Exception]:
         with rpr.inside_reaper():
-            rpr.Project().begin_undo_block()
             try:
                 ih = ItemsHandler(
                     sr=values[self.key_ns + 'samplerate']  # type:ignore
                 )
-                lf = LoopFinder(ih)
-                st_ofst, end_ofst = lf.get_loop(
-                    corr_wind_sec=values[self.key_ns +
-                                         'corr_wind'],  # type:ignore
-                    slide_wind_sec=values[self.key_ns +
-                                          'slide_wind'],  # type:ignore
+                period = (
+                    get_modulation_period(ih)
+                    if values[self.key_ns + 'periodic'] else None
+                )
+                corr_wind = values[self.key_ns + 'corr_wind']
+                slide_wind = values[self.key_ns + 'slide_wind']
+                bounds = None
+                if values[self.key_ns + 'auto_windows']:
+                    region = get_sustain_region(ih)
+                    if region is not None:
+                        corr_wind = region.corr_wind_sec
+                        slide_wind = region.slide_wind_sec
+                        bounds = (region.start, region.end)
+                lf = LoopFinder(
+                    ih, combine=MICS_COMBINE[values[self.key_ns + 'mics']]
+                )
+                found = lf.get_loop_candidates(
+                    corr_wind_sec=corr_wind,  # type:ignore
+                    slide_wind_sec=slide_wind,  # type:ignore
                     corr_treshold=values[self.key_ns +
                                          'corr_max_treshold'],  # type:ignore
-                    corr_min_treshold=values[self.key_ns +  # type:ignore
-                                             'corr_min_treshold'],
+                    candidates=int(
+                        values[self.key_ns + 'candidates']  # type:ignore
+                    ),
+                    pyramid=(
+                        (values[self.key_ns + 'samplerate'], )  # type:ignore
+                        if values[self.key_ns + 'pyramid'] else None
+                    ),
+                    period=period,
+                    snap_radius=self._snap_radius(values),
+                    bounds=bounds,
                 )
             except (ItemsError, LoopError) as e:
                 return e
-            ls = LoopSlicer(ih, lf)
-            ls.cut_and_fade(
-                st_ofst,
-                end_ofst,
-                crs_length=values[self.key_ns + 'cross_length'],  # type:ignore
-                crs_shape=self.cross_shapes[values[self.key_ns + 'cross_shape'
-                                                   ]  # type:ignore
-                                            ]
+            min_treshold = values[self.key_ns + 'corr_min_treshold']
+            if found[0].corr < min_treshold:  # type:ignore
+                self._found = []
+                self.candidate_info.update('')
+                return LoopError(
+                    (
+                        f'correlation with this selection is '
+                        f'{found[0].corr}. Which is below the target '
+                        f'quality: {min_treshold}'
+                    )
+                )
+            self._found = [
+                cand for cand in found
+                if cand.corr >= min_treshold  # type:ignore
+            ]
+            self._shapes = {}
+            if values[self.key_ns + 'score_seams']:
+                seams = lf.score_seams(
+                    self._found,
+                    values[self.key_ns + 'cross_length'],  # type:ignore
+                )
+                self._found = []
+                for seam in seams:
+                    if seam.candidate not in self._shapes:
+                        self._found.append(seam.candidate)
+                        self._shapes[seam.candidate] = seam.shape
+            self._current = 0
+            ts = rpr.Project().time_selection
+            self._looped = (
+                (ts.start, ts.end),
+                [
+                    (i_h.item.track, i_h.item.position)
+                    for i_h in ih.item_handlers
+                ],
+            )
+            return self._apply(ih, values)
+
+    def _make_loops(self, values: ValuesFilledType) -> ty.Optional[Exception]:
+        # make_loops enters Reaper itself only for reading and editing,
+        # so UI is not frozen during the search
+        try:
+            ih = ItemsHandler(
+                sr=values[self.key_ns + 'samplerate']  # type:ignore
+            )
+            done = make_loops(
+                ih,
+                corr_wind_sec=values[self.key_ns +
+                                     'corr_wind'],  # type:ignore
+                slide_wind_sec=values[self.key_ns +
+                                      'slide_wind'],  # type:ignore
+                crs_length=values[self.key_ns +
+                                  'cross_length'],  # type:ignore
+                crs_shape=self.cross_shapes[values[self.key_ns +
+                                                   'cross_shape']
+                                            ],  # type:ignore
+                corr_treshold=values[self.key_ns +
+                                     'corr_max_treshold'],  # type:ignore
+                corr_min_treshold=values[self.key_ns +  # type:ignore
+                                         'corr_min_treshold'],
+                pyramid=(
+                    (values[self.key_ns + 'samplerate'], )  # type:ignore
+                    if values[self.key_ns + 'pyramid'] else None
+                ),
+                periodic=bool(values[self.key_ns + 'periodic']),
+                snap_radius=self._snap_radius(values),
+                score_seams=bool(values[self.key_ns + 'score_seams']),
+                combine=MICS_COMBINE[values[self.key_ns + 'mics']],
+                auto_windows=bool(values[self.key_ns + 'auto_windows']),
+                progress=self._report_note,
             )
-            rpr.Project().end_undo_block('make loop')
+        except ItemsError as e:
+            return e
+        self._found = []
+        self.candidate_info.update('')
+        failed = [
+            result for _, result in done
+            if result.error is not None or result.corr < values[
+                self.key_ns + 'corr_min_treshold']  # type:ignore
+        ]
+        if failed:
+            return LoopError(f'{len(failed)} of {len(done)} notes not looped')
+        return None
+
+    def _report_note(self, idx: int, result: LoopResult) -> None:
+        self.candidate_info.update(f'note {idx + 1}: {result.corr:.4f}')
+        self.candidate_info.ParentForm.refresh()
+
+    def _step(self, values: ValuesFilledType,
+              step: int) -> ty.Optional[Exception]:
+        """Undo the current loop and make the next (or previous) one.
+
+        Undo is done only if the last undo point is the loop itself, then
+        the looped items are found by their tracks and positions, instead
+        of the current selection.
+        """
+        if len(self._found) < 2 or self._looped is None:
+            return None
+        with rpr.inside_reaper():
+            pr = rpr.Project()
+            last = rpr.reascript_api.Undo_CanUndo2(pr.id)  # type:ignore
+            if last != 'make loop':
+                self._found = []
+                self._looped = None
+                self.candidate_info.update('')
+                return LoopError(
+                    f'the last undo point is "{last}", not "make loop". '
+                    'Make loop again.'
+                )
+            pr.undo()
+            time_selection, anchors = self._looped
+            pr.time_selection = time_selection
+            self._current = (self._current + step) % len(self._found)
+            sr = ty.cast(int, values[self.key_ns + 'samplerate'])
+            try:
+                ih = ItemsHandler(
+                    sr=sr,
+                    item_handlers=[
+                        ItemHandler(sr=sr, item=self._find_item(*anchor))
+                        for anchor in anchors
+                    ]
+                )
+            except ItemsError as e:
+                return e
+            return self._apply(ih, values)
+
+    def _find_item(self, track: rpr.Track, position: float) -> rpr.Item:
+        for item in track.items:
+            if abs(item.position - position) < 1e-6:
+                return item
+        raise ItemsError(
+            f'looped item at {position} is not found on track {track.name}'
+        )
+
+    def _apply(self, ih: ItemsHandler,
+               values: ValuesFilledType) -> ty.Optional[Exception]:
+        cand = self._found[self._current]
+        self.candidate_info.update(
+            f'{self._current + 1}/{len(self._found)}: {cand.corr:.4f}'
+        )
+        shape = self._shapes.get(
+            cand, self.cross_shapes[values[self.key_ns + 'cross_shape']]
+        )
+        rpr.Project().begin_undo_block()
+        ls = LoopSlicer(ih, LoopFinder(ih))
+        ls.cut_and_fade(
+            cand.start,
+            cand.end,
+            crs_length=values[self.key_ns + 'cross_length'],  # type:ignore
+            crs_shape=shape,  # type:ignore
+        )
+        rpr.Project().end_undo_block('make loop')
         return None
 
 
@@ -343,6 +613,14 @@ class BaseArt:
 
     layout: LayoutType
     name: str
+    # key of PITCH_ENGINES, measure them with pitch_bench
+    pitch_engine: str = 'pyin'
+    # if False — root is estimated without expecting anything
+    use_expected_root: bool = True
+    # expected root is taken without pitch engine, if it is verified with
+    # confidence (margin over other candidates) and harmonicity (its fit)
+    root_confidence: float = .25
+    root_harmonicity: float = .8
 
     @abstractmethod
     def read(
@@ -351,26 +629,89 @@ class BaseArt:
         ...
 
     def get_root(
-        self, wildcards: WildcardDict, items_handler: ItemsHandler
+        self,
+        wildcards: WildcardDict,
+        items_handler: ItemsHandler,
+        expected_root: ty.Optional[str] = None,
     ) -> str:
         if Wildcard.root not in wildcards:
-            root = estimate_entire_root(
-                items_handler.load_audio()[0], sr=items_handler.sr
+            root = self.estimate_root(
+                items_handler.load_audio()[0], items_handler.sr,
+                expected_root
             )
         else:
             root = ty.cast(str, wildcards[Wildcard.root])
         return root
 
+    def estimate_root(
+        self,
+        audio: np.ndarray,
+        sr: int,
+        expected_root: ty.Optional[str] = None
+    ) -> str:
+        """Estimate root, searching around the expected one.
+
+        Expected root is verified by harmonics (see `verify_root`) first,
+        `pitch_engine` runs only if confidence is below `root_confidence`
+        or harmonicity is below `root_harmonicity`: on noisy or
+        inharmonic audio margin alone can confirm unrelated note.
+
+        Parameters
+        ----------
+        audio : np.ndarray
+        sr : int
+        expected_root : Optional[str], optional
+            if None — root of the closest left region metadata is used
+
+        Returns
+        -------
+        str
+            note name
+        """
+        engine = PITCH_ENGINES[self.pitch_engine]
+        if not self.use_expected_root:
+            return engine.estimate_root(audio, sr)
+        if expected_root is None:
+            expected_root = self.neighbour_root()
+        if expected_root is not None:
+            match = verify_root(audio, sr, expected_root)
+            if (
+                match.confidence >= self.root_confidence and
+                match.harmonicity >= self.root_harmonicity
+            ):
+                return match.note
+        return engine.estimate_root(audio, sr, expected_note=expected_root)
+
+    def neighbour_root(self) -> ty.Optional[str]:
+        """Get root from metadata of the closest left region, if any.
+
+        Returns
+        -------
+        Optional[str]
+        """
+        closest = self.get_closest_region('left')
+        if closest is None:
+            return None
+        metadata = closest[1]
+        if not isinstance(metadata, dict):
+            return None
+        root = metadata.get('root')
+        return root if isinstance(root, str) else None
+
     def process_wildcards(
         self,
         tokens: ty.List[str],
-        items_handler: ty.Optional[ItemsHandler] = None
+        items_handler: ty.Optional[ItemsHandler] = None,
+        expected_root: ty.Optional[str] = None,
     ) -> WildcardDict:
         """Get WildcardDict for requested tokens.
 
         Parameters
         ----------
         tokens : ty.List[str]
+        items_handler : Optional[ItemsHandler], optional
+        expected_root : Optional[str], optional
+            root pYIN searches around (see `estimate_root`)
 
         Returns
         -------
@@ -382,7 +723,7 @@ class BaseArt:
         wildcards: WildcardDict = {}
         for token in tokens:
             if has_wildcard(token, wildcard=Wildcard.root):
-                root = estimate_entire_root(audio[0], ih.sr)
+                root = self.estimate_root(audio[0], ih.sr, expected_root)
                 wildcards.update({Wildcard.root: root})
             if has_wildcard(token, wildcard=Wildcard.peak):
                 peak = amplitude_to_db(max(audio[0]))
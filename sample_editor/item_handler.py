@@ -1,17 +1,646 @@
 """Contains classes for manipulating of Reaper Items."""
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import hashlib
+import math
+import os
+import tempfile
+import threading
+import time
 import typing as ty
+from warnings import warn
 
 import reapy_boost as rpr
 
 import librosa as lr
 import numpy as np
+import soundfile as sf
+
+from .audio_io import open_mapped
 
 
 class ItemsError(Exception):
     ...
 
 
+class AudioCache:
+    """Persistent on-disk cache of decoded and resampled audio.
+
+    Every entry is a float32 mono array saved as ``.npy`` file. File name is
+    a hash of the source identity (path, mtime, size) and load parameters
+    (samplerate, offset, duration), so changed source files are never served
+    from the cache. When the cache grows over `max_size`, least recently used
+    entries are removed.
+
+    Attributes
+    ----------
+    path : Path
+        cache directory
+    max_size : int
+        size budget in bytes
+    """
+
+    def __init__(
+        self,
+        path: ty.Optional[ty.Union[str, Path]] = None,
+        max_size: int = 4 * 1024**3
+    ) -> None:
+        """
+        Parameters
+        ----------
+        path : Optional[Union[str, Path]], optional
+            If None — `~/.cache/sample_editor` is used.
+        max_size : int, optional
+            Size budget in bytes, 4 GB by default.
+        """
+        if path is None:
+            path = Path.home() / '.cache' / 'sample_editor'
+        self.path = Path(path)
+        self.max_size = max_size
+
+    def __repr__(self) -> str:
+        return "AudioCache(path={path}, max_size={size})".format(
+            path=self.path, size=self.max_size
+        )
+
+    def key(
+        self,
+        filename: str,
+        sr: int,
+        offset: float = 0.0,
+        duration: ty.Optional[float] = None
+    ) -> str:
+        """Get cache key for the audio region of source file.
+
+        Parameters
+        ----------
+        filename : str
+        sr : int
+        offset : float, optional
+            in seconds
+        duration : Optional[float], optional
+            in seconds, None means up to the end of file
+
+        Returns
+        -------
+        str
+        """
+        stat = os.stat(filename)
+        identity = (
+            str(Path(filename).resolve()),
+            stat.st_mtime_ns,
+            stat.st_size,
+            sr,
+            round(offset, 9),
+            None if duration is None else round(duration, 9),
+        )
+        return hashlib.sha1(repr(identity).encode()).hexdigest()
+
+    def _file(self, key: str) -> Path:
+        return self.path / (key + '.npy')
+
+    def get(self, key: str) -> ty.Optional[np.ndarray]:
+        """Get cached audio or None if there is no entry for key."""
+        file = self._file(key)
+        try:
+            audio = np.load(file)
+            # mark entry as recently used
+            os.utime(file)
+        except (OSError, ValueError):
+            return None
+        return audio  # type:ignore
+
+    def put(self, key: str, audio: np.ndarray) -> None:
+        """Store audio and evict old entries if cache is overfilled."""
+        file = self._file(key)
+        tmp: ty.Optional[str] = None
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            # unique name: the same entry can be written by several
+            # processes at once
+            with tempfile.NamedTemporaryFile(
+                dir=self.path, suffix='.tmp', delete=False
+            ) as f:
+                tmp = f.name
+                np.save(f, audio.astype(np.float32, copy=False))
+            os.replace(tmp, file)
+        except OSError as e:
+            if tmp is not None and os.path.exists(tmp):
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+            warn(f'Cannot write audio cache: {e}')
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove least recently used entries over the size budget."""
+        entries: ty.List[ty.Tuple[float, int, Path]] = []
+        for file in self.path.glob('*.npy'):
+            try:
+                stat = file.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, file))
+        total = sum(size for _, size, _ in entries)
+        for _, size, file in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_size:
+                break
+            try:
+                file.unlink()
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self) -> None:
+        """Remove all cache entries."""
+        for file in self.path.glob('*.npy'):
+            try:
+                file.unlink()
+            except OSError:
+                continue
+
+    def load(
+        self,
+        filename: str,
+        sr: int,
+        offset: float = 0.0,
+        duration: ty.Optional[float] = None
+    ) -> np.ndarray:
+        """Load mono audio from cache, decode and store it on miss.
+
+        Parameters
+        ----------
+        filename : str
+        sr : int
+        offset : float, optional
+            in seconds
+        duration : Optional[float], optional
+            in seconds, None means up to the end of file
+
+        Returns
+        -------
+        np.ndarray
+            float32 mono audio
+        """
+        key = self.key(filename, sr, offset, duration)
+        audio = self.get(key)
+        if audio is not None:
+            return audio
+        audio = lr.load(
+            filename,
+            sr=sr,
+            mono=True,
+            offset=offset,
+            duration=duration,
+            dtype=np.float32,
+        )[0]
+        self.put(key, audio)
+        return audio  # type:ignore
+
+
+class SourceBuffers:
+    """Resident decoded sources, one buffer per (source, samplerate).
+
+    Items, pointing to the same source file are sliced from the single
+    decoded buffer, so decoding and resampling are made once per source
+    instead of once per item. Buffers are read-only and slices are views.
+    When buffers grow over `max_size`, least recently used are dropped.
+
+    Sources, which decoded size is over `max_source` (or is unknown), are
+    never made resident: only the requested region is read, the same way
+    as without buffers. So a short item of a long take doesn't cost
+    decoding and keeping the whole take.
+
+    Attributes
+    ----------
+    cache : Optional[AudioCache]
+        used for decoding, if None — sources are decoded directly
+    max_size : int
+        size budget in bytes
+    max_source : int
+        the biggest decoded source kept resident, in bytes
+    """
+
+    def __init__(
+        self,
+        cache: ty.Optional[AudioCache] = None,
+        max_size: int = 1024**3,
+        max_source: int = 128 * 1024**2,
+    ) -> None:
+        self.cache = cache
+        self.max_size = max_size
+        self.max_source = max_source
+        self._buffers: 'OrderedDict[ty.Tuple[str, int, int, int], np.ndarray]'
+        self._buffers = OrderedDict()
+        self._lock = threading.Lock()
+        self._decoding: ty.Dict[ty.Tuple[str, int, int, int],
+                                threading.Lock] = {}
+
+    def __repr__(self) -> str:
+        return (
+            "SourceBuffers(cache={cache}, max_size={size}, "
+            "max_source={source})"
+        ).format(
+            cache=self.cache, size=self.max_size, source=self.max_source
+        )
+
+    def is_resident(self, filename: str, sr: int) -> bool:
+        """Whether source is small enough to be decoded entirely."""
+        size = _decoded_size(filename, sr)
+        return size is not None and size <= self.max_source
+
+    def get(self, filename: str, sr: int) -> np.ndarray:
+        """Get the entire decoded source.
+
+        Parameters
+        ----------
+        filename : str
+        sr : int
+
+        Returns
+        -------
+        np.ndarray
+            read-only float32 mono buffer
+        """
+        stat = os.stat(filename)
+        key = (str(Path(filename).resolve()), sr, stat.st_mtime_ns,
+               stat.st_size)
+        with self._lock:
+            if key in self._buffers:
+                self._buffers.move_to_end(key)
+                return self._buffers[key]
+            key_lock = self._decoding.setdefault(key, threading.Lock())
+        # the same source requested from several threads is decoded once
+        with key_lock:
+            with self._lock:
+                if key in self._buffers:
+                    return self._buffers[key]
+            if self.cache is not None:
+                buffer = self.cache.load(filename, sr)
+            else:
+                buffer = lr.load(
+                    filename, sr=sr, mono=True, dtype=np.float32
+                )[0]
+            buffer.setflags(write=False)
+            with self._lock:
+                self._buffers[key] = buffer
+                self._decoding.pop(key, None)
+                self._evict()
+        return buffer
+
+    def slice(
+        self, filename: str, sr: int, offset: float, duration: float
+    ) -> np.ndarray:
+        """Get view of the source region.
+
+        Parameters
+        ----------
+        filename : str
+        sr : int
+        offset : float
+            in seconds
+        duration : float
+            in seconds
+
+        Returns
+        -------
+        np.ndarray
+            read-only view of the source buffer, or the region read alone,
+            if source is not resident (see `is_resident`)
+        """
+        if not self.is_resident(filename, sr):
+            if self.cache is not None:
+                return self.cache.load(filename, sr, offset, duration)
+            return lr.load(  # type:ignore
+                filename,
+                sr=sr,
+                mono=True,
+                offset=offset,
+                duration=duration,
+                dtype=np.float32,
+            )[0]
+        buffer = self.get(filename, sr)
+        start = max(0, int(round(offset * sr)))
+        stop = max(start, int(round((offset + duration) * sr)))
+        return buffer[start:stop]
+
+    def _evict(self) -> None:
+        total = sum(buffer.nbytes for buffer in self._buffers.values())
+        # the most recent buffer is kept even if it's over budget
+        while total > self.max_size and len(self._buffers) > 1:
+            _, buffer = self._buffers.popitem(last=False)
+            total -= buffer.nbytes
+
+    def clear(self) -> None:
+        """Drop all resident buffers."""
+        with self._lock:
+            self._buffers.clear()
+
+
+def _decoded_size(filename: str, sr: int) -> ty.Optional[int]:
+    """Get size of the entire source decoded at sr in bytes.
+
+    None if the source header can't be read without decoding.
+    """
+    mapped = open_mapped(filename)
+    if mapped is not None:
+        frames, source_sr = mapped.frames, mapped.samplerate
+    else:
+        try:
+            info = sf.info(filename)
+        except RuntimeError:
+            return None
+        frames, source_sr = info.frames, info.samplerate
+    return math.ceil(frames * sr / source_sr) * np.dtype(np.float32).itemsize
+
+
+#: Module-wide cache used by ItemHandler.load_audio.
+#: Budget can be changed by `audio_cache.max_size = ...`.
+audio_cache = AudioCache()
+#: Module-wide resident sources used by ItemHandler.load_audio.
+source_buffers = SourceBuffers(audio_cache)
+FeatureT = ty.TypeVar('FeatureT')
+#: feature name, whether it's computed from mono audio, and sorted params
+FeatureKey = ty.Tuple[str, bool, ty.Tuple[ty.Tuple[str, object], ...]]
+#: Samples per block used for in-place mixdown.
+_MIX_BLOCK = 65536
+
+
+def _iter_region(
+    filename: str, sr: int, offset: float, duration: float, chunk: int
+) -> ty.Iterator[np.ndarray]:
+    """Iterate over consecutive mono chunks of the source region.
+
+    Only one chunk is held in memory at once: memory-mapped sources
+    are converted block by block, others are read by single soundfile
+    decoder. If samplerate differs, chunks are resampled as one stream
+    (see `_resample_stream`), so output is the same as windowed `lr.load`
+    gives. Formats soundfile can't read are decoded once by librosa
+    as a whole region.
+    """
+    total = int(round(duration * sr))
+    mapped = open_mapped(filename)
+    if mapped is not None:
+        src_sr = mapped.samplerate
+        chunks = mapped.iter_blocks(offset, duration, block=chunk)
+    else:
+        try:
+            src_sr = sf.info(filename).samplerate
+        except RuntimeError:
+            y = lr.load(
+                filename,
+                sr=sr,
+                mono=True,
+                offset=offset,
+                duration=duration,
+                dtype=np.float32,
+            )[0][:total]
+            for pos in range(0, len(y), chunk):
+                yield y[pos:pos + chunk]
+            return
+        chunks = _iter_decoded(filename, src_sr, offset, duration, chunk)
+    pos = 0
+    for y in _resample_stream(chunks, src_sr, sr):
+        if pos >= total:
+            return
+        y = y[:total - pos]
+        pos += len(y)
+        yield y
+
+
+def _iter_decoded(
+    filename: str, sr: int, offset: float, duration: float, chunk: int
+) -> ty.Iterator[np.ndarray]:
+    """Read mono float32 chunks of the file region by one decoder."""
+    with sf.SoundFile(filename) as file:
+        file.seek(min(int(round(offset * sr)), file.frames))
+        left = int(round(duration * sr))
+        while left > 0:
+            y = file.read(min(chunk, left), dtype='float32', always_2d=True)
+            if not len(y):
+                return
+            left -= len(y)
+            yield y.mean(axis=1, dtype=np.float32)
+
+
+def _resample_stream(
+    chunks: ty.Iterable[np.ndarray], orig_sr: int, target_sr: int
+) -> ty.Iterator[np.ndarray]:
+    """Resample consecutive chunks as one signal.
+
+    Resampler is the librosa default one, as `lr.load` uses. Every piece
+    is filtered with enough samples around it, so output matches
+    resampling of the whole signal.
+    """
+    if orig_sr == target_sr:
+        yield from chunks
+        return
+    gcd = math.gcd(orig_sr, target_sr)
+    up, down = target_sr // gcd, orig_sr // gcd
+    # input samples, that affect output sample on each side (windowed sinc
+    # of 64 zero crossings, stretched when downsampling, with reserve),
+    # rounded up to whole periods, where input and output samples meet
+    reach = int(np.ceil(128 * max(1.0, orig_sr / target_sr)))
+    context = -(-reach // down) * down
+    pending = np.zeros(0, dtype=np.float32)
+    # samples at the pending start, which are kept only as left context
+    done = 0
+    for chunk in chunks:
+        pending = np.concatenate((pending, chunk))
+        ready = (len(pending) - done - context) // down * down
+        if ready <= 0:
+            continue
+        out = lr.resample(
+            pending[:done + ready + context],
+            orig_sr=orig_sr,
+            target_sr=target_sr
+        )
+        yield out[done * up // down:(done + ready) * up // down]
+        start = max(0, done + ready - context)
+        pending = pending[start:]
+        done = done + ready - start
+    if len(pending) > done:
+        out = lr.resample(pending, orig_sr=orig_sr, target_sr=target_sr)
+        yield out[done * up // down:]
+
+
+def _aligned(streams: ty.Sequence[ty.Iterator[np.ndarray]],
+             size: int) -> ty.Iterator[ty.List[np.ndarray]]:
+    """Regroup chunks of several streams into aligned pieces of size.
+
+    Chunk lengths of the streams differ (e.g. resampled from different
+    samplerates), so every stream is buffered, and each yielded list
+    holds the same samples range of every stream. Streams, which end
+    earlier, give shorter (or empty) pieces.
+    """
+    pending = [np.zeros(0, dtype=np.float32) for _ in streams]
+    active = [True] * len(streams)
+    while True:
+        for idx, stream in enumerate(streams):
+            while active[idx] and len(pending[idx]) < size:
+                try:
+                    pending[idx] = np.concatenate((pending[idx], next(stream)))
+                except StopIteration:
+                    active[idx] = False
+        pieces = [buffer[:size] for buffer in pending]
+        if not any(len(piece) for piece in pieces):
+            return
+        pending = [buffer[size:] for buffer in pending]
+        yield pieces
+
+
+def _overlapping(chunks: ty.Iterable[np.ndarray], block: int,
+                 hop: int) -> ty.Iterator[np.ndarray]:
+    """Regroup consecutive chunks into blocks, starting every hop samples.
+
+    The last block is shorter, if the stream isn't multiple of hop.
+    """
+    pending: ty.Optional[np.ndarray] = None
+    # samples at the pending start, that are already yielded
+    yielded = 0
+    for chunk in chunks:
+        if pending is None:
+            pending = chunk
+        else:
+            pending = np.concatenate((pending, chunk))
+        while len(pending) >= block:
+            yield pending[:block]
+            pending = pending[hop:]
+            yielded = block - hop
+    if pending is not None and len(pending) > yielded:
+        yield pending
+
+
+def _compute_rms(
+    audio: np.ndarray, frame_length: int, hop_length: int
+) -> np.ndarray:
+    return lr.feature.rms(  # type:ignore
+        y=audio, frame_length=frame_length, hop_length=hop_length
+    )[0]
+
+
+def _compute_energy_index(audio: np.ndarray) -> np.ndarray:
+    index = np.zeros((len(audio) + 1, ) + audio.shape[1:], dtype=np.float64)
+    np.cumsum(np.square(audio, dtype=np.float64), axis=0, out=index[1:])
+    return index
+
+
+# features, indexed by frames in time, which can be sliced for derived
+# handler. Features computed from them (like sorted frames) are not.
+FRAME_FEATURES = frozenset(('rms', 'pyin'))
+
+
+def _rms_edges(
+    frames: np.ndarray, audio: np.ndarray, frame_length: int,
+    hop_length: int
+) -> np.ndarray:
+    """Recompute sliced RMS frames, which windows cross the audio edges.
+
+    Inside the parent audio they see samples beyond the new region, while
+    fresh computation pads them.
+    """
+    edge = min(frame_length // (2 * hop_length) + 1, len(frames))
+    frames = frames.copy()
+    head = (2 * edge) * hop_length + frame_length
+    frames[:edge] = _compute_rms(audio[:head], frame_length,
+                                 hop_length)[:edge]
+    tail = max(0, len(frames) - 1 - 2 * edge) * hop_length
+    frames[-edge:] = _compute_rms(audio[tail:], frame_length,
+                                  hop_length)[-edge:]
+    return frames
+
+
+def _slice_features(
+    features: ty.Dict[FeatureKey, object], start: int, stop: int,
+    audio: np.ndarray, mono: bool
+) -> ty.Dict[FeatureKey, object]:
+    """Get frames of features for audio[start:stop] as views.
+
+    Only features from `FRAME_FEATURES` are sliced, and only if start
+    lays on frame boundary. Features can be arrays with frames on the last
+    axis, or objects with `slice_frames(first, last)` method. The rest are
+    dropped and computed again on demand. RMS frames at the region edges
+    are recomputed from the new audio, so they are the same as fresh ones.
+    """
+    sliced: ty.Dict[FeatureKey, object] = {}
+    for key, value in features.items():
+        if key[1] != mono or key[0] not in FRAME_FEATURES:
+            continue
+        hop = dict(key[2]).get('hop_length')
+        if not isinstance(hop, int) or start % hop:
+            continue
+        first = start // hop
+        last = first + 1 + (stop - start) // hop
+        if key[0] == 'rms' and mono:
+            params = dict(key[2])
+            sliced[key] = _rms_edges(
+                value[first:last], audio,  # type:ignore
+                params['frame_length'], hop
+            )
+        elif isinstance(value, np.ndarray):
+            sliced[key] = value[..., first:last]
+        elif hasattr(value, 'slice_frames'):
+            sliced[key] = value.slice_frames(first, last)  # type:ignore
+    return sliced
+
+
+def _read_region(
+    filename: str, sr: int, offset: float, duration: float, use_cache: bool
+) -> np.ndarray:
+    """Read mono region of the source file without calling Reaper API."""
+    mapped = open_mapped(filename) if use_cache else None
+    if mapped is not None and mapped.samplerate == sr:
+        return mapped.read(offset, duration)
+    if use_cache:
+        return source_buffers.slice(filename, sr, offset, duration)
+    return lr.load(  # type:ignore
+        filename,
+        sr=sr,
+        mono=True,
+        offset=offset,
+        duration=duration,
+    )[0]
+
+
+def _source_samplerate(filename: str) -> int:
+    mapped = open_mapped(filename)
+    if mapped is not None:
+        return mapped.samplerate
+    return int(lr.get_samplerate(filename))
+
+
+def _mixdown(
+    audios: ty.List[np.ndarray], vols: ty.List[float], dtype: np.dtype
+) -> np.ndarray:
+    """Sum scaled audios into the single preallocated buffer.
+
+    Scaling is made block by block into small scratch buffer, so no
+    full-length temporary arrays are created.
+    """
+    out = np.zeros(max(len(y) for y in audios), dtype=dtype)
+    scratch = np.empty(_MIX_BLOCK, dtype=dtype)
+    for y, vol in zip(audios, vols):
+        for start in range(0, len(y), _MIX_BLOCK):
+            block = y[start:start + _MIX_BLOCK]
+            tmp = scratch[:len(block)]
+            np.multiply(block, vol, out=tmp)
+            out[start:start + len(block)] += tmp
+    return out
+
+
+def _stack(
+    audios: ty.List[np.ndarray], vols: ty.List[float], dtype: np.dtype
+) -> np.ndarray:
+    """Scale audios directly into columns of preallocated buffer."""
+    out = np.zeros((max(len(y) for y in audios), len(audios)), dtype=dtype)
+    for idx, (y, vol) in enumerate(zip(audios, vols)):
+        np.multiply(y, vol, out=out[:len(y), idx])
+    return out
+
+
 @rpr.inside_reaper()
 def _select_items_in_ts(pr: rpr.Project) -> None:
     if len(pr.selected_tracks):
@@ -133,7 +762,22 @@ class ItemHandler:
             t_v = self.take.get_info_value("D_VOL")
         return i_v * t_v
 
-    def load_audio(self, reaper_vol: bool = True) -> ty.Iterable[float]:
+    @property
+    def source_sr(self) -> int:
+        """Native samplerate of the item source file.
+
+        :type: int
+        """
+        with rpr.inside_reaper():
+            filename = self.source.filename
+        return _source_samplerate(filename)
+
+    def load_audio(
+        self,
+        reaper_vol: bool = True,
+        use_cache: bool = True,
+        dtype: np.dtype = np.float32,
+    ) -> ty.Iterable[float]:
         """Get np.array of Item audiodata in mono.
 
         Parameters
@@ -141,27 +785,47 @@ class ItemHandler:
         reaper_vol : bool, optional
             Default to True
             Sohuld audio be normalized to the Reaper item*take level or not
+        use_cache : bool, optional
+            Default to True
+            If False — item region is decoded without touching
+            `source_buffers` and `audio_cache`
+        dtype : np.dtype, optional
+            float32 by default
 
         Returns
         -------
         ty.Iterable[float]
+            If reaper_vol is False and cache is used — read-only view
+            of the source buffer.
+
+        Note
+        ----
+        Uncompressed sources at their native samplerate are memory-mapped,
+        so only the item region is read and converted.
 
+        """
+        filename, offset, duration, vol = self._get_load_params(reaper_vol)
+        loaded = _read_region(filename, self.sr, offset, duration, use_cache)
+        if reaper_vol:
+            return np.multiply(loaded, vol, dtype=dtype)  # type:ignore
+        return loaded.astype(dtype, copy=False)  # type:ignore
+
+    def _get_load_params(
+        self,
+        reaper_vol: bool = True
+    ) -> ty.Tuple[str, float, float, float]:
+        """Get everything needed for reading audio outside of Reaper.
+
+        Returns
+        -------
+        Tuple[str, float, float, float]
+            filename, offset, duration, volume
         """
         with rpr.inside_reaper():
-            source = self.source
-            filename = source.filename
-            sr = self.sr
+            filename = self.source.filename
             offset, duration = self._get_item_bounds()
-        loaded = lr.load(
-            filename,
-            sr=sr,
-            mono=True,
-            offset=offset,
-            duration=duration,
-        )[0]
-        if reaper_vol:
-            loaded *= self.vol
-        return loaded  # type:ignore
+            vol = self.vol if reaper_vol else 1.0
+        return filename, offset, duration, vol
 
 
 class ItemsHandler:
@@ -172,16 +836,24 @@ class ItemsHandler:
     Attributes
     ----------
     item_handlers : List[ItemHandler]
+    load_timings : List[Tuple[ItemHandler, float]]
+        seconds, spent on reading of each item by the last `load_audio`
     pr : reapy.Project
     sr : int
         samplerate
+    workers : Optional[int]
+        amount of threads, used for reading items audio
+    dtype : np.dtype
+        dtype of loaded audio
     """
 
     def __init__(
         self,
         sr: int = 22050,
         item_handlers: ty.Optional[ty.List[ItemHandler]] = None,
-        split_at_ts: bool = False
+        split_at_ts: bool = False,
+        workers: ty.Optional[int] = None,
+        dtype: np.dtype = np.float32,
     ) -> None:
         """
         Parameters
@@ -192,16 +864,30 @@ class ItemsHandler:
             If None — any items in time selection are Used
         split_at_ts : bool, optional
             If True — items are split at time selection
+        workers : Optional[int], optional
+            Amount of threads for reading items audio.
+            If None — ThreadPoolExecutor default, 1 means serial reading.
+        dtype : np.dtype, optional
+            float32 by default, float64 can be used for extra precision
+            of the mono mixdown.
         """
         if split_at_ts:
             # Item: Split item_handlers at time selection
             rpr.perform_action(40061)
         self.sr = sr
+        self.workers = workers
+        self.dtype = np.dtype(dtype)
+        self.load_timings: ty.List[ty.Tuple[ItemHandler, float]] = []
         self.pr = rpr.Project()
         self.item_handlers = self._get_items(
         ) if item_handlers is None else item_handlers
         self._audios: ty.Optional[ty.List[ty.Iterable[float]]] = None
         self._audio_mono: ty.Optional[ty.List[ty.Iterable[float]]] = None
+        # features of mono audio by (name, params), see get_feature()
+        self._features: ty.Dict[FeatureKey, object] = {}
+        # load params of items, the cached audio was read with
+        self._anchor: ty.Optional[ty.List[ty.Tuple[str, float, float,
+                                                   float]]] = None
 
     @rpr.inside_reaper()
     def _get_items(self) -> ty.List[ItemHandler]:
@@ -212,6 +898,71 @@ class ItemsHandler:
             for item in self.pr.selected_items
         ]
 
+    def _derived(self, item_handlers: ty.List[ItemHandler]) -> 'ItemsHandler':
+        """Make new handler with the same settings."""
+        return ItemsHandler(
+            sr=self.sr,
+            item_handlers=item_handlers,
+            workers=self.workers,
+            dtype=self.dtype,
+        )
+
+    def _inherit_audio(self, parent: 'ItemsHandler') -> None:
+        """Take views of parent's loaded audio instead of reloading.
+
+        Audio is inherited only if every item reads the same source with
+        the same volume as the parent's one, all items are shifted inside
+        the source by the same amount and the new region lays inside the
+        loaded one. Otherwise cached audio is dropped.
+
+        Parameters
+        ----------
+        parent : ItemsHandler
+            can be self, if items were edited
+        """
+        anchor = parent._anchor
+        audio_mono, audios = parent._audio_mono, parent._audios
+        features = parent._features
+        self._audio_mono, self._audios, self._anchor = None, None, None
+        self._features = {}
+        if anchor is None or (audio_mono is None and audios is None):
+            return
+        if (self.sr, self.dtype) != (parent.sr, parent.dtype):
+            return
+        if len(anchor) != len(self.item_handlers):
+            return
+        with rpr.inside_reaper():
+            params = [ih._get_load_params() for ih in self.item_handlers]
+        tolerance = 1 / self.sr
+        shift = params[0][1] - anchor[0][1]
+        for (fn, offset, duration, vol), (a_fn, a_offset, a_duration,
+                                          a_vol) in zip(params, anchor):
+            if fn != a_fn or not math.isclose(vol, a_vol):
+                return
+            if abs(offset - a_offset - shift) > tolerance:
+                return
+            if shift < -tolerance:
+                return
+            if offset + duration > a_offset + a_duration + tolerance:
+                return
+        start = max(0, int(round(shift * self.sr)))
+        stop = start + int(round(params[0][2] * self.sr))
+        if audio_mono is not None:
+            self._audio_mono = [audio_mono[0][start:stop]]  # type:ignore
+            self._features.update(
+                _slice_features(
+                    features, start, stop, self._audio_mono[0], mono=True
+                )
+            )
+        if audios is not None:
+            self._audios = audios[start:stop]  # type:ignore
+            self._features.update(
+                _slice_features(
+                    features, start, stop, self._audios, mono=False
+                )
+            )
+        self._anchor = params
+
     def split(self,
               position: float) -> ty.Tuple['ItemsHandler', 'ItemsHandler']:
         """Split items and return a couple of handlers.
@@ -232,9 +983,10 @@ class ItemsHandler:
             il, ir = item.item.split(position)
             itms_l.append(ItemHandler(sr=self.sr, item=il))
             itms_r.append(ItemHandler(sr=self.sr, item=ir))
-        return ItemsHandler(sr=self.sr, item_handlers=itms_l), ItemsHandler(
-            sr=self.sr, item_handlers=itms_r
-        )
+        left, right = self._derived(itms_l), self._derived(itms_r)
+        left._inherit_audio(self)
+        right._inherit_audio(self)
+        return left, right
 
     def split_by_items_gaps(self) -> ty.List['ItemsHandler']:
         """Get ItemsHadler for each of item group in timeline.
@@ -250,7 +1002,7 @@ class ItemsHandler:
                 times[bounds].append(ih)
                 continue
             times[bounds] = [ih]
-        return [ItemsHandler(self.sr, ihs) for ihs in times.values()]
+        return [self._derived(ihs) for ihs in times.values()]
 
     def make_copy(
         self,
@@ -283,7 +1035,9 @@ class ItemsHandler:
                 old_take.start_offset + additional_source_offset
             )
             new_i_hndlrs.append(ItemHandler(sr=self.sr, item=new_item))
-        return ItemsHandler(sr=self.sr, item_handlers=new_i_hndlrs)
+        copy = self._derived(new_i_hndlrs)
+        copy._inherit_audio(self)
+        return copy
 
     def delete(self) -> None:
         """Delete all items."""
@@ -357,6 +1111,7 @@ class ItemsHandler:
     def position(self, position: float) -> None:
         for i_h in self.item_handlers:
             i_h.item.position = position
+        self._inherit_audio(self)
 
     @property
     def start_offset(self) -> float:
@@ -367,6 +1122,7 @@ class ItemsHandler:
         with rpr.inside_reaper():
             for ih in self.item_handlers:
                 ih.item.active_take.start_offset = offset
+        self._inherit_audio(self)
 
     @property
     def length(self) -> float:
@@ -376,6 +1132,57 @@ class ItemsHandler:
     def length(self, length: float) -> None:
         for i_h in self.item_handlers:
             i_h.item.length = length
+        self._inherit_audio(self)
+
+    @property
+    def source_sr(self) -> int:
+        """Native samplerate of the first item source.
+
+        :type: int
+        """
+        return self.item_handlers[0].source_sr
+
+    def with_sr(self, sr: int) -> 'ItemsHandler':
+        """Get handler of the same items with another samplerate.
+
+        Parameters
+        ----------
+        sr : int
+
+        Returns
+        -------
+        ItemsHandler
+        """
+        if sr == self.sr:
+            return self
+        return ItemsHandler(
+            sr=sr,
+            item_handlers=[
+                ItemHandler(sr=sr, item=ih.item) for ih in self.item_handlers
+            ],
+            workers=self.workers,
+            dtype=self.dtype,
+        )
+
+    def detach(self, reaper_vol: bool = True) -> 'DetachedItems':
+        """Get picklable snapshot of items audio regions.
+
+        Parameters
+        ----------
+        reaper_vol : bool, optional
+            Default to True
+
+        Returns
+        -------
+        DetachedItems
+
+        Raises
+        ------
+        ItemsError
+            If items are not identical
+        """
+        _, params = self._get_reading_params(reaper_vol)
+        return DetachedItems(self.sr, params, self.dtype)
 
     def get_longest_items_on_each_track(self) -> 'ItemsHandler':
         items: ty.Dict[str, ItemHandler] = {}
@@ -385,7 +1192,7 @@ class ItemsHandler:
                 if ih.item.length < items[tr].item.length:
                     continue
             items[tr] = ih
-        return ItemsHandler(self.sr, list(items.values()))
+        return self._derived(list(items.values()))
 
     def load_audio(self,
                    mono: bool = True,
@@ -408,26 +1215,258 @@ class ItemsHandler:
         ------
         ItemsError
             If items are not identical
+
+        Note
+        ----
+        Items are read in `workers` threads, time spent on every item
+        is stored in `load_timings`.
         """
         if mono and self._audio_mono is not None:
             return self._audio_mono
         if not mono and self._audios is not None:
             return self._audios
+        handlers, params = self._get_reading_params(reaper_vol)
+        read = self._read_regions(params)
+        self.load_timings = [
+            (ih, timing) for ih, (_, timing) in zip(handlers, read)
+        ]
+        audios = [y for y, _ in read]
+        vols = [param[3] for param in params]
+        self._anchor = params if handlers is self.item_handlers else None
+        self._features = {
+            key: value
+            for key, value in self._features.items() if key[1] != mono
+        }
+        if mono:
+            self._audio_mono = [self._mixdown(audios, vols)]
+            return self._audio_mono
+        self._audios = self._stack(audios, vols)
+        return self._audios  # type:ignore
+
+    def _get_reading_params(
+        self,
+        reaper_vol: bool = True
+    ) -> ty.Tuple[ty.List[ItemHandler], ty.List[ty.Tuple[str, float, float,
+                                                          float]]]:
+        """Get handlers to be read and their load params.
+
+        Raises
+        ------
+        ItemsError
+            If items are not identical
+        """
         with rpr.inside_reaper():
             items_handler = self
             if not self.are_bounds_identical:
                 items_handler = self.get_longest_items_on_each_track()
                 if not items_handler.are_bounds_identical:
                     raise ItemsError('bounds of items are not identical')
-            audios: ty.List[ty.Iterable[float]] = []
-            for ih in items_handler.item_handlers:
-                y = ih.load_audio(reaper_vol=reaper_vol)
-                audios.append(y)
-        if mono:
-            self._audio_mono = [np.sum(audios, 0)]
-            return self._audio_mono
-        self._audios = np.column_stack(audios)
-        return self._audios  # type:ignore
+            handlers = items_handler.item_handlers
+            params = [ih._get_load_params(reaper_vol) for ih in handlers]
+        return handlers, params
+
+    def iter_blocks(
+        self,
+        block: int,
+        hop: ty.Optional[int] = None,
+        mono: bool = True,
+        reaper_vol: bool = True,
+    ) -> ty.Iterator[np.ndarray]:
+        """Iterate over overlapping blocks of items audio.
+
+        If audio is not loaded yet — sources are read chunk by chunk,
+        so memory stays bounded for takes of any length. Otherwise
+        blocks are views of the loaded audio.
+
+        Parameters
+        ----------
+        block : int
+            block length in samples
+        hop : Optional[int], optional
+            distance between block starts in samples.
+            If None — equals block (no overlap)
+        mono : bool, optional
+            Default to True
+        reaper_vol : bool, optional
+            Default to True
+
+        Yields
+        ------
+        np.ndarray
+            (block, ) if mono else (block, channels).
+            The last block can be shorter.
+
+        Raises
+        ------
+        ItemsError
+            If items are not identical
+        ValueError
+            If hop is not within (0, block]
+        """
+        hop = block if hop is None else hop
+        if not 0 < hop <= block:
+            raise ValueError(f'hop should be within (0, {block}]: {hop}')
+        cached = (
+            self._audio_mono[0] if mono and self._audio_mono is not None else
+            self._audios if not mono else None
+        )
+        if cached is not None:
+            yield from _overlapping([cached], block, hop)  # type:ignore
+            return
+        _, params = self._get_reading_params(reaper_vol)
+        chunk = max(block, _MIX_BLOCK)
+        readers = [
+            _iter_region(filename, self.sr, offset, duration, chunk)
+            for filename, offset, duration, _ in params
+        ]
+        vols = [param[3] for param in params]
+
+        def mixed() -> ty.Iterator[np.ndarray]:
+            for audios in _aligned(readers, chunk):
+                if mono:
+                    yield self._mixdown(audios, vols)
+                else:
+                    yield self._stack(audios, vols)
+
+        yield from _overlapping(mixed(), block, hop)
+
+    def _mixdown(
+        self, audios: ty.List[np.ndarray], vols: ty.List[float]
+    ) -> np.ndarray:
+        return _mixdown(audios, vols, self.dtype)
+
+    def _stack(
+        self, audios: ty.List[np.ndarray], vols: ty.List[float]
+    ) -> np.ndarray:
+        return _stack(audios, vols, self.dtype)
+
+    def _read_regions(
+        self, params: ty.List[ty.Tuple[str, float, float, float]]
+    ) -> ty.List[ty.Tuple[np.ndarray, float]]:
+        """Read items regions in thread pool, keeping their order.
+
+        Returns
+        -------
+        List[Tuple[np.ndarray, float]]
+            audio and time, spent on reading it
+        """
+
+        def read(
+            param: ty.Tuple[str, float, float, float]
+        ) -> ty.Tuple[np.ndarray, float]:
+            filename, offset, duration, _ = param
+            start = time.perf_counter()
+            audio = _read_region(filename, self.sr, offset, duration, True)
+            return audio, time.perf_counter() - start
+
+        if self.workers == 1 or len(params) < 2:
+            return [read(param) for param in params]
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(read, params))
+
+    def get_feature(
+        self,
+        name: str,
+        compute: ty.Callable[..., FeatureT],
+        mono: bool = True,
+        **params: ty.Any
+    ) -> FeatureT:
+        """Get feature of audio, computing it only once.
+
+        Features are kept until the audio itself is reloaded. Frame-based
+        features (see `FRAME_FEATURES`) are passed to handlers, derived by
+        split and edits, as views, if new region starts at the frame
+        boundary.
+
+        Parameters
+        ----------
+        name : str
+            feature name, used with params as cache key
+        compute : Callable[..., FeatureT]
+            called as compute(audio, **params) on cache miss
+        mono : bool, optional
+            If False — feature is computed from (samples, channels) audio
+        **params
+            hashable feature parameters
+
+        Returns
+        -------
+        FeatureT
+        """
+        key = (name, mono, tuple(sorted(params.items())))
+        if key not in self._features:
+            audio = self.load_audio(mono=mono)
+            if mono:
+                audio = audio[0]  # type:ignore
+            self._features[key] = compute(audio, **params)
+        return ty.cast(FeatureT, self._features[key])
+
+    def get_rms_frames(
+        self,
+        frame_length: int = 2048,
+        hop_length: int = 512
+    ) -> np.ndarray:
+        """Get RMS frames of mono audio (librosa.feature.rms).
+
+        Parameters
+        ----------
+        frame_length : int, optional
+        hop_length : int, optional
+
+        Returns
+        -------
+        np.ndarray
+            1-D array of frames
+        """
+        return self.get_feature(
+            'rms',
+            _compute_rms,
+            frame_length=frame_length,
+            hop_length=hop_length
+        )
+
+    def get_sorted_rms_frames(
+        self,
+        frame_length: int = 2048,
+        hop_length: int = 512
+    ) -> np.ndarray:
+        """Get sorted RMS frames, used for median and percentiles.
+
+        Parameters
+        ----------
+        frame_length : int, optional
+        hop_length : int, optional
+
+        Returns
+        -------
+        np.ndarray
+        """
+        return self.get_feature(
+            'rms_sorted',
+            lambda audio, **params: np.sort(self.get_rms_frames(**params)),
+            frame_length=frame_length,
+            hop_length=hop_length
+        )
+
+    def get_energy_index(self, mono: bool = True) -> np.ndarray:
+        """Get cumulative sum of squared samples (float64).
+
+        Energy of samples [start, stop) is
+        ``index[stop] - index[start]``, so energy and RMS of any window
+        are computed in constant time.
+
+        Parameters
+        ----------
+        mono : bool, optional
+            If False — index is computed per channel
+
+        Returns
+        -------
+        np.ndarray
+            (samples + 1, ) if mono else (samples + 1, channels),
+            starting with zero
+        """
+        return self.get_feature('energy_index', _compute_energy_index, mono)
 
     def fade_in(self, length: float, shape: int = 0) -> None:
         with rpr.inside_reaper():
@@ -440,3 +1479,157 @@ class ItemsHandler:
             for i_h in self.item_handlers:
                 i_h.item.set_info_value('D_FADEOUTLEN', length)
                 i_h.item.set_info_value('C_FADEOUTSHAPE', shape)
+
+
+class DetachedItems:
+    """Audio regions of items, detached from Reaper.
+
+    Keeps only what is needed for reading items audio: source filenames,
+    offsets, durations and volumes. So it can be pickled and processed
+    in another process, where Reaper API is not available.
+    Reading interface is the same as `ItemsHandler` has.
+
+    After `preload` the regions themselves (at the native samplerate) are
+    kept and pickled as well, so another process doesn't decode sources
+    again, and audio of any samplerate is resampled from them.
+
+    Attributes
+    ----------
+    sr : int
+        samplerate
+    params : List[Tuple[str, float, float, float]]
+        filename, offset, duration, volume of each item
+    dtype : np.dtype
+    regions : Optional[List[Tuple[np.ndarray, int]]]
+        mono audio of each item region and its samplerate,
+        None if not preloaded
+    """
+
+    def __init__(
+        self,
+        sr: int,
+        params: ty.List[ty.Tuple[str, float, float, float]],
+        dtype: np.dtype = np.float32,
+        regions: ty.Optional[ty.List[ty.Tuple[np.ndarray, int]]] = None,
+    ) -> None:
+        self.sr = sr
+        self.params = params
+        self.dtype = np.dtype(dtype)
+        self.regions = regions
+        self._audio_mono: ty.Optional[ty.List[np.ndarray]] = None
+        self._audios: ty.Optional[np.ndarray] = None
+        self._features: ty.Dict[FeatureKey, object] = {}
+
+    def __getstate__(self) -> ty.Dict[str, object]:
+        return {
+            'sr': self.sr,
+            'params': self.params,
+            'dtype': self.dtype,
+            'regions': self.regions
+        }
+
+    def __setstate__(self, state: ty.Dict[str, object]) -> None:
+        self.__init__(**state)  # type:ignore
+
+    def preload(self) -> 'DetachedItems':
+        """Read regions of items at the native samplerate once.
+
+        Returns
+        -------
+        DetachedItems
+            self
+        """
+        if self.regions is None:
+            self.regions = []
+            for filename, offset, duration, _ in self.params:
+                source_sr = _source_samplerate(filename)
+                self.regions.append(
+                    (
+                        _read_region(
+                            filename, source_sr, offset, duration, True
+                        ), source_sr
+                    )
+                )
+        return self
+
+    @property
+    def source_sr(self) -> int:
+        """Native samplerate of the first item source.
+
+        :type: int
+        """
+        if self.regions is not None:
+            return self.regions[0][1]
+        return _source_samplerate(self.params[0][0])
+
+    def with_sr(self, sr: int) -> 'DetachedItems':
+        """Get the same regions with another samplerate."""
+        if sr == self.sr:
+            return self
+        return DetachedItems(sr, self.params, self.dtype, self.regions)
+
+    def _read(self, idx: int) -> np.ndarray:
+        """Read mono audio of item at the samplerate."""
+        if self.regions is None:
+            filename, offset, duration, _ = self.params[idx]
+            return _read_region(filename, self.sr, offset, duration, True)
+        audio, source_sr = self.regions[idx]
+        if source_sr == self.sr:
+            return audio
+        # the same as windowed lr.load, which resamples the region alone
+        return lr.resample(  # type:ignore
+            audio, orig_sr=source_sr, target_sr=self.sr
+        )
+
+    def load_audio(self, mono: bool = True) -> ty.List[ty.Iterable[float]]:
+        """Load audio of items, the same as `ItemsHandler.load_audio`.
+
+        Parameters
+        ----------
+        mono : bool, optional
+            Default to True
+
+        Returns
+        -------
+        ty.List[ty.Iterable[float]]
+        """
+        if mono and self._audio_mono is not None:
+            return self._audio_mono  # type:ignore
+        if not mono and self._audios is not None:
+            return self._audios  # type:ignore
+        audios = [self._read(idx) for idx in range(len(self.params))]
+        vols = [param[3] for param in self.params]
+        if mono:
+            self._audio_mono = [_mixdown(audios, vols, self.dtype)]
+            return self._audio_mono  # type:ignore
+        self._audios = _stack(audios, vols, self.dtype)
+        return self._audios  # type:ignore
+
+    def get_feature(
+        self,
+        name: str,
+        compute: ty.Callable[..., FeatureT],
+        mono: bool = True,
+        **params: ty.Any
+    ) -> FeatureT:
+        """Get feature of audio, the same as `ItemsHandler.get_feature`."""
+        key = (name, mono, tuple(sorted(params.items())))
+        if key not in self._features:
+            audio = self.load_audio(mono=mono)
+            if mono:
+                audio = audio[0]  # type:ignore
+            self._features[key] = compute(audio, **params)
+        return ty.cast(FeatureT, self._features[key])
+
+    def get_rms_frames(
+        self,
+        frame_length: int = 2048,
+        hop_length: int = 512
+    ) -> np.ndarray:
+        """Get RMS frames, the same as `ItemsHandler.get_rms_frames`."""
+        return self.get_feature(
+            'rms',
+            _compute_rms,
+            frame_length=frame_length,
+            hop_length=hop_length
+        )
@@ -1,83 +1,1367 @@
+from concurrent.futures import ProcessPoolExecutor
+import os
+import time
 import typing as ty
 
 import reapy_boost as rpr
 
 import librosa as lr
 import numpy as np
+from scipy import signal as sig
 
-from .item_handler import ItemsHandler
+from .item_handler import DetachedItems, ItemsHandler
+from .pitch_tracker import get_f0_track
 
 
 class LoopError(Exception):
     ...
 
 
+def _sliding_dot(template: np.ndarray, signal: np.ndarray) -> np.ndarray:
+    """Dot products of template with every window of signal (FFT-based).
+
+    Arrays are (samples, channels), all channels are convolved
+    in one batch.
+
+    Returns
+    -------
+    np.ndarray
+        (len(signal) - len(template) + 1, channels) values
+    """
+    return sig.fftconvolve(signal, template[::-1], mode='valid', axes=0)
+
+
+class CorrelationEngine:
+    """Normalized cross-correlation of equal-length windows of one array.
+
+    Running sums of samples and their squares are kept as prefix sums,
+    so mean and variance of any window are computed in constant time.
+    Dot products of the window with all lags are computed at once by FFT.
+    Values are the same as `np.corrcoef` gives for every pair of windows.
+
+    Multichannel array (samples, channels) is correlated channel by
+    channel in the same batched FFT, and curves are combined into one:
+    by minimum (the loop should work on every channel) or weighted mean.
+    Mirrored curve, which is used only for seeding the search, is computed
+    on the weighted mix of channels, so the cost stays close to the mono
+    one.
+    """
+
+    def __init__(
+        self,
+        ar: np.ndarray,
+        combine: str = 'min',
+        weights: ty.Optional[ty.Sequence[float]] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        ar : np.ndarray
+            (samples, ) or (samples, channels)
+        combine : str, optional
+            'min' or 'mean', how channels curves are combined
+        weights : Optional[Sequence[float]], optional
+            channels weights for 'mean', equal if None
+
+        Raises
+        ------
+        ValueError
+            If combine mode is unknown
+        """
+        if combine not in ('min', 'mean'):
+            raise ValueError(f'combine should be "min" or "mean": {combine}')
+        ar = np.asarray(ar, dtype=np.float64)
+        self.ar = ar[:, None] if ar.ndim == 1 else ar
+        self.combine = combine
+        channels = self.ar.shape[1]
+        weights = np.ones(channels) if weights is None else np.asarray(
+            weights, dtype=np.float64
+        )
+        self.weights = weights / weights.sum()
+        zeros = np.zeros((1, channels))
+        self._sum = np.concatenate((zeros, np.cumsum(self.ar, axis=0)))
+        self._sq_sum = np.concatenate(
+            (zeros, np.cumsum(self.ar**2, axis=0))
+        )
+        self._mix = None if channels == 1 else CorrelationEngine(
+            self.ar @ self.weights
+        )
+
+    def __len__(self) -> int:
+        return len(self.ar)
+
+    @property
+    def channels(self) -> int:
+        return self.ar.shape[1]
+
+    def _stats(self, starts: np.ndarray,
+               length: int) -> ty.Tuple[np.ndarray, np.ndarray]:
+        """Get sums and centered squared sums of windows."""
+        sums = self._sum[starts + length] - self._sum[starts]
+        sq_sums = self._sq_sum[starts + length] - self._sq_sum[starts]
+        return sums, sq_sums - sums**2 / length
+
+    def _normalize(
+        self, dots: np.ndarray, x_starts: np.ndarray, y_starts: np.ndarray,
+        length: int
+    ) -> np.ndarray:
+        x_sum, x_var = self._stats(x_starts, length)
+        y_sum, y_var = self._stats(y_starts, length)
+        denom = np.sqrt(np.maximum(x_var, 0.0) * np.maximum(y_var, 0.0))
+        cov = dots - x_sum * y_sum / length
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = np.where(denom > 0, cov / denom, 0.0)
+        corr = np.clip(corr, -1.0, 1.0)
+        if self.channels == 1:
+            return corr[:, 0]
+        if self.combine == 'min':
+            return corr.min(axis=1)
+        return corr @ self.weights
+
+    def fixed_curve(self, fixed: int, starts: np.ndarray,
+                    length: int) -> np.ndarray:
+        """Correlation of the fixed window with windows at given starts.
+
+        Parameters
+        ----------
+        fixed : int
+            start of the fixed window
+        starts : np.ndarray
+            starts of windows to compare with, should be contiguous range
+            (in any direction)
+        length : int
+            window length
+
+        Returns
+        -------
+        np.ndarray
+            correlation for each of starts
+        """
+        starts = np.asarray(starts)
+        low, high = int(starts.min()), int(starts.max())
+        template = self.ar[fixed:fixed + length]
+        dots = _sliding_dot(template, self.ar[low:high + length])
+        dots = dots[starts - low]
+        return self._normalize(
+            dots, np.full_like(starts, fixed), starts, length
+        )
+
+    def mirrored_curve(
+        self,
+        amount: int,
+        length: int,
+        corr_treshold: ty.Optional[float] = None,
+        allowed: ty.Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """Correlation of windows moving from both edges to the middle.
+
+        Value `i` is correlation of ar[i:i + length] with
+        ar[-(i + length):-i].
+
+        Both windows move, so there is no single template to convolve with,
+        dot products are computed by strided views, in chunks. If
+        corr_treshold is given, computation stops after the first chunk
+        with value over it, like the sliding search did.
+        For multichannel array the curve of weighted mix of channels
+        is returned.
+
+        Parameters
+        ----------
+        amount : int
+            how many steps to make
+        length : int
+            window length
+        corr_treshold : Optional[float], optional
+            stop after chunk, reaching it
+        allowed : Optional[np.ndarray], optional
+            bool mask of steps, others are set to -inf
+
+        Returns
+        -------
+        np.ndarray
+            of amount values, or less if stopped early
+        """
+        if self._mix is not None:
+            return self._mix.mirrored_curve(
+                amount, length, corr_treshold, allowed
+            )
+        n = len(self.ar)
+        ar = self.ar[:, 0]
+        views = np.lib.stride_tricks.sliding_window_view
+        heads = views(ar[:amount + length - 1], length)
+        tails = views(ar[n - length - amount + 1:], length)[::-1]
+        curve = np.empty(amount)
+        chunk = max(1, _MIRRORED_CHUNK // length)
+        for start in range(0, amount, chunk):
+            stop = min(start + chunk, amount)
+            dots = np.einsum('ij,ij->i', heads[start:stop],
+                             tails[start:stop])
+            idxes = np.arange(start, stop)
+            part = self._normalize(
+                dots[:, None], idxes, n - length - idxes, length
+            )
+            if allowed is not None:
+                part = np.where(allowed[start:stop], part, -np.inf)
+            curve[start:stop] = part
+            if corr_treshold is not None and part.max() >= corr_treshold:
+                return curve[:stop]
+        return curve
+
+
+#: max size of strided chunk for mirrored correlation
+_MIRRORED_CHUNK = 2**20
+
+
+def _pick(curve: np.ndarray, corr_treshold: float) -> ty.Tuple[float, int]:
+    """Get the first value over threshold, or the best one if none.
+
+    The same as sliding with early exit on the threshold, and taking
+    the argmax of slided values.
+    """
+    over = curve >= corr_treshold
+    idx = int(np.argmax(over)) if over.any() else int(np.argmax(curve))
+    return float(curve[idx]), idx
+
+
+def _top_peaks(
+    curve: np.ndarray,
+    k: int,
+    min_distance: int,
+    first: ty.Optional[int] = None
+) -> ty.List[int]:
+    """Get indexes of k best values, at least min_distance apart.
+
+    Greedy non-maximum suppression: the best value is taken and its
+    neighbourhood is masked before looking for the next one.
+    If first is given, it is taken instead of the first best value.
+    """
+    curve = np.array(curve, dtype=np.float64)
+    peaks: ty.List[int] = []
+    for _ in range(min(k, len(curve))):
+        idx = int(np.argmax(curve)) if first is None else first
+        first = None
+        if curve[idx] == -np.inf:
+            break
+        peaks.append(idx)
+        curve[max(0, idx - min_distance):idx + min_distance + 1] = -np.inf
+    return peaks
+
+
+def _neighbourhood(center: int, radius: int, limit: int) -> np.ndarray:
+    """Get indexes of center ± radius, clipped to [0, limit)."""
+    center = min(max(center, 0), limit - 1)
+    return np.arange(max(0, center - radius), min(limit, center + radius + 1))
+
+
+def _period_mask(
+    lengths: np.ndarray, period: float, tolerance: float
+) -> np.ndarray:
+    """Mark loop lengths within tolerance from whole number of periods."""
+    periods = np.round(lengths / period)
+    return (periods >= 1) & (np.abs(lengths - periods * period) <= tolerance)
+
+
+def estimate_period(
+    envelope: np.ndarray,
+    frame_rate: float,
+    min_period: float = 0.05,
+    max_period: float = 1.0,
+    min_strength: float = 0.3,
+) -> ty.Optional[float]:
+    """Estimate modulation period of envelope by its autocorrelation.
+
+    The first autocorrelation peak, which is close to the highest one
+    within periods range, is taken (so multiples of the period are not
+    confused with it), and refined by parabolic interpolation.
+
+    Parameters
+    ----------
+    envelope : np.ndarray
+        e.g. RMS frames or f0 track without gaps
+    frame_rate : float
+        envelope frames per second
+    min_period : float, optional
+        in seconds
+    max_period : float, optional
+        in seconds
+    min_strength : float, optional
+        normalized autocorrelation, below which envelope is not periodic
+
+    Returns
+    -------
+    Optional[float]
+        period in seconds, None if envelope is not periodic
+    """
+    env = np.asarray(envelope, dtype=np.float64)
+    env = env - env.mean()
+    n = len(env)
+    min_lag = max(1, int(np.floor(min_period * frame_rate)))
+    max_lag = min(n - 2, int(np.ceil(max_period * frame_rate)))
+    if max_lag <= min_lag:
+        return None
+    spec = np.fft.rfft(env, 2 * n)
+    acf = np.fft.irfft(spec.real**2 + spec.imag**2)[:n]
+    if acf[0] <= 0:
+        return None
+    # unbiased, so long lags are not penalized by the shorter overlap
+    acf = acf / acf[0] * n / (n - np.arange(n))
+    lags = np.arange(min_lag, max_lag + 1)
+    is_peak = (acf[lags] > acf[lags - 1]) & (acf[lags] >= acf[lags + 1])
+    peaks = lags[is_peak]
+    if not len(peaks) or acf[peaks].max() < min_strength:
+        return None
+    lag = int(peaks[np.argmax(acf[peaks] >= acf[peaks].max() * 0.9)])
+    left, mid, right = acf[lag - 1:lag + 2]
+    curvature = left - 2 * mid + right
+    shift = 0.5 * (left - right) / curvature if curvature < 0 else 0.0
+    return (lag + shift) / frame_rate
+
+
+def get_modulation_period(
+    items_handler: ty.Union[ItemsHandler, DetachedItems],
+    source: str = 'rms',
+    min_period: float = 0.05,
+    max_period: float = 1.0,
+    hop_length: int = 256,
+) -> ty.Optional[float]:
+    """Get tremolo (RMS) or vibrato (f0) period of items audio.
+
+    Parameters
+    ----------
+    items_handler : Union[ItemsHandler, DetachedItems]
+    source : str, optional
+        'rms' for tremolo or 'f0' for vibrato
+    min_period : float, optional
+        in seconds
+    max_period : float, optional
+        in seconds
+    hop_length : int, optional
+        of the envelope frames, in samples
+
+    Returns
+    -------
+    Optional[float]
+        period in seconds, None if audio is not periodic
+    """
+    if source == 'rms':
+        envelope = items_handler.get_rms_frames(
+            frame_length=hop_length * 4, hop_length=hop_length
+        )
+    elif source == 'f0':
+        f0 = get_f0_track(items_handler, hop_length=hop_length).f0
+        voiced = np.flatnonzero(np.isfinite(f0))
+        if len(voiced) < 2:
+            return None
+        f0 = f0[voiced[0]:voiced[-1] + 1]
+        frames = np.arange(len(f0))
+        known = np.isfinite(f0)
+        envelope = np.interp(frames, frames[known], np.log2(f0[known]))
+    else:
+        raise ValueError(f'source should be "rms" or "f0": {source}')
+    return estimate_period(
+        envelope, items_handler.sr / hop_length, min_period, max_period
+    )
+
+
+class SustainRegion(ty.NamedTuple):
+    """Stable part of note and loop search windows fitting it.
+
+    Attributes
+    ----------
+    start : float
+        offset from the selection start in seconds
+    end : float
+        offset from the selection end in seconds
+    corr_wind_sec : float
+    slide_wind_sec : float
+    """
+
+    start: float
+    end: float
+    corr_wind_sec: float
+    slide_wind_sec: float
+
+
+def _rolling_mean_std(values: np.ndarray,
+                      window: int) -> ty.Tuple[np.ndarray, np.ndarray]:
+    """Mean and std of every window of values, by prefix sums."""
+    sums = np.concatenate(([0.0], np.cumsum(values)))
+    sq_sums = np.concatenate(([0.0], np.cumsum(values**2)))
+    mean = (sums[window:] - sums[:-window]) / window
+    var = (sq_sums[window:] - sq_sums[:-window]) / window - mean**2
+    return mean, np.sqrt(np.maximum(var, 0.0))
+
+
+def find_sustain(
+    rms: np.ndarray,
+    frame_rate: float,
+    duration: float,
+    f0: ty.Optional[np.ndarray] = None,
+    window: float = 0.2,
+    max_level_std: float = 1.5,
+    max_level_drop: float = 12.0,
+    max_pitch_std: float = 20.0,
+    min_length: float = 0.3,
+) -> ty.Optional[SustainRegion]:
+    """Find the longest stable span of note by its frames.
+
+    Frame is stable if window centered on it has low level deviation
+    (and low pitch deviation, if f0 is given), and its level is not far
+    below the peak level. Attack and release are excluded this way.
+
+    Parameters
+    ----------
+    rms : np.ndarray
+        RMS frames (centered)
+    frame_rate : float
+        frames per second
+    duration : float
+        of the audio, frames are computed from, in seconds
+    f0 : Optional[np.ndarray], optional
+        f0 frames of the same frame rate, NaN for unvoiced
+    window : float, optional
+        in seconds, window of deviation measuring
+    max_level_std : float, optional
+        in dB
+    max_level_drop : float, optional
+        in dB below the peak level
+    max_pitch_std : float, optional
+        in cents
+    min_length : float, optional
+        in seconds, shorter spans are not counted as sustain
+
+    Returns
+    -------
+    Optional[SustainRegion]
+        None if there is no sustain
+    """
+    rms = np.asarray(rms, dtype=np.float64)
+    level = 20 * np.log10(np.maximum(rms, 1e-10))
+    n = len(level)
+    win = max(2, int(round(window * frame_rate)))
+    if n < win:
+        return None
+    _, level_std = _rolling_mean_std(level, win)
+    stable = level_std <= max_level_std
+    if f0 is not None:
+        f0_n = np.full(n, np.nan)
+        f0_n[:len(f0)] = np.asarray(f0, dtype=np.float64)[:n]
+        voiced = np.isfinite(f0_n) & (f0_n > 0)
+        if not voiced.any():
+            return None
+        cents = np.zeros(n)
+        cents[voiced] = 1200 * np.log2(f0_n[voiced] / np.median(f0_n[voiced]))
+        unvoiced, _ = _rolling_mean_std((~voiced).astype(np.float64), win)
+        _, pitch_std = _rolling_mean_std(cents, win)
+        stable &= (unvoiced < 0.5 / win) & (pitch_std <= max_pitch_std)
+    # frame is stable if the window centered on it is stable
+    covered = np.zeros(n, dtype=bool)
+    covered[win // 2:win // 2 + len(stable)] = stable
+    covered &= level >= level.max() - max_level_drop
+    edges = np.diff(np.concatenate(([0], covered.view(np.int8), [0])))
+    starts, stops = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    if not len(starts):
+        return None
+    longest = int(np.argmax(stops - starts))
+    start = starts[longest] / frame_rate
+    stop = min((stops[longest] - 1) / frame_rate, duration)
+    length = stop - start
+    if length < min_length:
+        return None
+    corr_wind = float(np.clip(length * 0.1, 0.05, 0.35))
+    slide_wind = float(np.clip(length * 0.4 - corr_wind, 0.05, 3.0))
+    return SustainRegion(start, duration - stop, corr_wind, slide_wind)
+
+
+def get_sustain_region(
+    items_handler: ty.Union[ItemsHandler, DetachedItems],
+    use_f0: bool = False,
+    hop_length: int = 512,
+) -> ty.Optional[SustainRegion]:
+    """Find sustain of items audio by cached RMS (and f0) frames.
+
+    Parameters
+    ----------
+    items_handler : Union[ItemsHandler, DetachedItems]
+    use_f0 : bool, optional
+        If True — pitch should be steady as well (pYIN track is computed
+        once and cached)
+    hop_length : int, optional
+
+    Returns
+    -------
+    Optional[SustainRegion]
+        None if there is no sustain, see `find_sustain`
+    """
+    sr = items_handler.sr
+    rms = items_handler.get_rms_frames(
+        frame_length=hop_length * 4, hop_length=hop_length
+    )
+    f0 = None
+    if use_f0:
+        f0 = get_f0_track(
+            items_handler, frame_length=hop_length * 4, hop_length=hop_length
+        ).f0
+    duration = len(items_handler.load_audio()[0]) / sr  # type:ignore
+    return find_sustain(rms, sr / hop_length, duration, f0)
+
+
+class _Candidate(ty.NamedTuple):
+    corr: float
+    start_idx: int
+    e_idx: int
+
+
+def _suppress(found: ty.Iterable[_Candidate], k: int,
+              min_distance: int) -> ty.List[_Candidate]:
+    """Get k best candidates, dropping those close to the better ones.
+
+    Candidate is dropped if both its start and tail are within
+    min_distance from the start and tail of already taken one.
+    """
+    kept: ty.List[_Candidate] = []
+    for cand in sorted(set(found), reverse=True):
+        if any(
+            abs(cand.start_idx - other.start_idx) <= min_distance
+            and abs(cand.e_idx - other.e_idx) <= min_distance
+            for other in kept
+        ):
+            continue
+        kept.append(cand)
+        if len(kept) == k:
+            break
+    return kept
+
+
+class LoopCandidate(ty.NamedTuple):
+    """Loop points in seconds, as `LoopFinder.get_loop` returns them.
+
+    Attributes
+    ----------
+    start : float
+        offset from the selection start
+    end : float
+        offset from the selection end
+    corr : float
+        correlation of the loop start and end
+    """
+
+    start: float
+    end: float
+    corr: float
+
+
+class ZeroCrossingIndex:
+    """Zero crossings of audio and waveform slopes at them.
+
+    Built once per audio, then loop points of any amount of candidates
+    are snapped to crossings by binary search.
+
+    Attributes
+    ----------
+    positions : np.ndarray
+        sample indexes `i`, where sign of audio[i] differs from audio[i-1]
+    values : np.ndarray
+        audio[i] at every position
+    slopes : np.ndarray
+        audio[i] - audio[i-1] at every position
+    length : int
+        audio length in samples
+    """
+
+    def __init__(self, audio: np.ndarray) -> None:
+        audio = np.asarray(audio)
+        signs = np.signbit(audio)
+        self.positions = np.flatnonzero(signs[1:] != signs[:-1]) + 1
+        self.values = audio[self.positions].astype(np.float64)
+        self.slopes = self.values - audio[self.positions - 1]
+        self.length = len(audio)
+        self._audio = audio
+
+    def seam_cost(self, starts: np.ndarray, seams: np.ndarray) -> np.ndarray:
+        """Jump of value and slope, when playback goes from seam to start."""
+        audio = self._audio
+        starts = np.clip(starts, 1, self.length - 1)
+        seams = np.clip(seams, 1, self.length - 1)
+        values = audio[starts].astype(np.float64) - audio[seams]
+        slopes = (audio[starts].astype(np.float64) - audio[starts - 1]
+                  ) - (audio[seams].astype(np.float64) - audio[seams - 1])
+        return np.abs(values) + np.abs(slopes)
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def nearest(self, idxes: np.ndarray) -> np.ndarray:
+        """Get indexes (in positions) of the nearest crossings."""
+        idxes = np.asarray(idxes)
+        right = np.clip(
+            np.searchsorted(self.positions, idxes), 1,
+            len(self.positions) - 1
+        )
+        left = right - 1
+        closer_left = (idxes - self.positions[left]
+                       ) <= (self.positions[right] - idxes)
+        return np.where(closer_left, left, right)
+
+    def snap(self, starts: np.ndarray, seams: np.ndarray,
+             radius: int) -> ty.Tuple[np.ndarray, np.ndarray]:
+        """Move loop points to crossings with matching slopes.
+
+        Seam (the sample, where playback jumps to the loop start) is moved
+        to the nearest crossing. Start is shifted by the same amount, so
+        the correlated waveforms stay aligned, and is moved to the crossing
+        of the same slope sign within radius, which value and slope are
+        the closest to the seam ones.
+        Points are kept, if there are no suitable crossings within radius,
+        or if moving them makes `seam_cost` higher.
+
+        Parameters
+        ----------
+        starts : np.ndarray
+            loop starts in samples
+        seams : np.ndarray
+            loop ends in samples
+        radius : int
+            in samples
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            starts, seams
+        """
+        orig_starts = starts = np.array(starts, dtype=np.int64)
+        orig_seams = seams = np.array(seams, dtype=np.int64)
+        if len(self.positions) < 2:
+            return starts, seams
+        starts, seams = starts.copy(), seams.copy()
+        nearest = self.nearest(seams)
+        shift = self.positions[nearest] - seams
+        movable = np.abs(shift) <= radius
+        seams[movable] += shift[movable]
+        starts[movable] += shift[movable]
+        lows = np.searchsorted(self.positions, starts - radius, 'left')
+        highs = np.searchsorted(self.positions, starts + radius, 'right')
+        for idx in np.flatnonzero(movable):
+            window = slice(lows[idx], highs[idx])
+            slope = self.slopes[nearest[idx]]
+            mismatch = np.where(
+                np.signbit(self.slopes[window]) == np.signbit(slope),
+                np.abs(self.slopes[window] - slope) +
+                np.abs(self.values[window] - self.values[nearest[idx]]),
+                np.inf
+            )
+            if not len(mismatch) or mismatch.min() == np.inf:
+                continue
+            # the closest one of equally matching crossings
+            distance = np.abs(self.positions[window] - starts[idx])
+            best = np.lexsort((distance, mismatch))[0]
+            starts[idx] = self.positions[lows[idx] + best]
+        worse = self.seam_cost(starts, seams) > self.seam_cost(
+            orig_starts, orig_seams
+        )
+        starts[worse] = orig_starts[worse]
+        seams[worse] = orig_seams[worse]
+        return starts, seams
+
+
+#: fade-in curves of Reaper fade shapes (C_FADEINSHAPE) on t in [0, 1],
+#: fade-out is the same curve mirrored in time. Approximations of Reaper
+#: curves with default curvature, good enough for comparing seams.
+FADE_CURVES: ty.Dict[int, ty.Callable[[np.ndarray], np.ndarray]] = {
+    0: lambda t: t,
+    1: lambda t: 1 - (1 - t)**2,
+    2: lambda t: t**2,
+    3: lambda t: 1 - (1 - t)**4,
+    4: lambda t: t**4,
+    5: lambda t: t * t * (3 - 2 * t),
+    6: lambda t: (lambda s: s * s * (3 - 2 * s))(t * t * (3 - 2 * t)),
+}
+
+
+def fade_curves(shape: int, length: int) -> ty.Tuple[np.ndarray, np.ndarray]:
+    """Get fade-in and fade-out gains of Reaper fade shape.
+
+    Parameters
+    ----------
+    shape : int
+        Reaper fade shape, see FADE_CURVES
+    length : int
+        in samples
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        fade_in, fade_out
+    """
+    t = (np.arange(length) + 0.5) / max(length, 1)
+    fade_in = FADE_CURVES[shape](t)
+    return fade_in, fade_in[::-1]
+
+
+class SeamScore(ty.NamedTuple):
+    """Quality of crossfaded seam, the lower the better.
+
+    Attributes
+    ----------
+    candidate : LoopCandidate
+    shape : int
+        Reaper fade shape
+    flux : float
+        max spectral flux across the seam, minus the flux of the audio
+        around loop start and end played continuously (negative, if the
+        seam is smoother)
+    level_jump : float
+        max level difference of adjacent frames across the seam in dB,
+        minus the one of the audio played continuously
+    score : float
+        flux + level_jump * level_weight
+    """
+
+    candidate: 'LoopCandidate'
+    shape: int
+    flux: float
+    level_jump: float
+    score: float
+
+
+class SeamRenderer:
+    """Render crossfaded loop seams in memory and score them.
+
+    Seam is rendered the same way `LoopSlicer.cut_and_fade` makes it:
+    audio before the loop end, crossfade of the loop end (fading out) with
+    the loop start (fading in), and audio after the crossfade from the
+    loop start. Its spectral flux and level jump are measured relatively
+    to the same audio without the seam, so natural changes of sound
+    (e.g. tremolo) are not counted.
+    """
+
+    def __init__(
+        self,
+        audio: np.ndarray,
+        sr: int,
+        context: float = 0.1,
+        n_fft: int = 1024,
+        hop_length: int = 256,
+        level_weight: float = 0.1,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        audio : np.ndarray
+            mono audio of the selection
+        sr : int
+        context : float, optional
+            seconds of audio around the crossfade to be scored
+        n_fft : int, optional
+        hop_length : int, optional
+        level_weight : float, optional
+            weight of level jump in dB, relatively to spectral flux
+        """
+        self.audio = np.asarray(audio, dtype=np.float64)
+        self.sr = sr
+        self.context = int(lr.core.time_to_samples(context, sr=sr))
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.level_weight = level_weight
+        self._window = np.hanning(n_fft)
+
+    def _take(self, start: int, length: int) -> np.ndarray:
+        """Get audio[start:start + length], zero-padded out of bounds."""
+        out = np.zeros(length)
+        first, last = max(start, 0), min(start + length, len(self.audio))
+        if last > first:
+            out[first - start:last - start] = self.audio[first:last]
+        return out
+
+    def render(
+        self, start: int, seam: int, crs_length: int, shape: int
+    ) -> np.ndarray:
+        """Render seam of loop.
+
+        Parameters
+        ----------
+        start : int
+            loop start in samples
+        seam : int
+            loop end in samples (crossfade starts here)
+        crs_length : int
+            crossfade length in samples
+        shape : int
+            Reaper fade shape
+
+        Returns
+        -------
+        np.ndarray
+            context + crossfade + context samples
+        """
+        fade_in, fade_out = fade_curves(shape, crs_length)
+        return np.concatenate(
+            (
+                self._take(seam - self.context, self.context),
+                self._take(seam, crs_length) * fade_out +
+                self._take(start, crs_length) * fade_in,
+                self._take(start + crs_length, self.context),
+            )
+        )
+
+    def _measure(self,
+                 rendered: np.ndarray) -> ty.Tuple[np.ndarray, np.ndarray]:
+        """Get max spectral flux and level jump of every rendered seam."""
+        views = np.lib.stride_tricks.sliding_window_view
+        frames = views(rendered, self.n_fft,
+                       axis=-1)[..., ::self.hop_length, :]
+        spec = np.abs(np.fft.rfft(frames * self._window, axis=-1))
+        log_spec = np.log1p(spec)
+        flux = np.maximum(np.diff(log_spec, axis=-2), 0).mean(axis=-1)
+        rms = np.sqrt(np.mean(frames**2, axis=-1))
+        level = 20 * np.log10(np.maximum(rms, 1e-10))
+        jump = np.abs(np.diff(level, axis=-1))
+        return flux.max(axis=-1), jump.max(axis=-1)
+
+    def score(
+        self,
+        found: ty.Sequence['LoopCandidate'],
+        crs_length: float,
+        shapes: ty.Optional[ty.Iterable[int]] = None,
+    ) -> ty.List[SeamScore]:
+        """Score every candidate with every fade shape, in one batch.
+
+        Parameters
+        ----------
+        found : Sequence[LoopCandidate]
+        crs_length : float
+            crossfade length in seconds
+        shapes : Optional[Iterable[int]], optional
+            Reaper fade shapes, all of FADE_CURVES if None
+
+        Returns
+        -------
+        List[SeamScore]
+            the best first
+        """
+        shapes = list(FADE_CURVES if shapes is None else shapes)
+        crs = max(1, int(lr.core.time_to_samples(crs_length, sr=self.sr)))
+        pairs = [(cand, shape) for cand in found for shape in shapes]
+        if not pairs:
+            return []
+        points = {
+            cand: (
+                int(lr.core.time_to_samples(cand.start, sr=self.sr)),
+                len(self.audio) -
+                int(lr.core.time_to_samples(cand.end, sr=self.sr)),
+            )
+            for cand in found
+        }
+        length = 2 * self.context + crs
+        rendered = np.stack(
+            [
+                self.render(*points[cand], crs, shape)
+                for cand, shape in pairs
+            ] + [
+                # kept inside the audio: zero padding would be counted
+                # as natural change
+                self._take(
+                    min(max(0, point - self.context),
+                        max(0, len(self.audio) - length)),
+                    length
+                ) for cand in found for point in points[cand]
+            ]
+        )
+        flux, jump = self._measure(rendered)
+        # the louder of natural changes around start and end
+        ref_flux = flux[len(pairs):].reshape(-1, 2).max(axis=1)
+        ref_jump = jump[len(pairs):].reshape(-1, 2).max(axis=1)
+        ref_idx = {cand: idx for idx, cand in enumerate(found)}
+        scores = []
+        for (cand, shape), f, j in zip(pairs, flux, jump):
+            # not clipped at zero: smooth seams still differ by shape
+            f = float(f - ref_flux[ref_idx[cand]])
+            j = float(j - ref_jump[ref_idx[cand]])
+            scores.append(
+                SeamScore(cand, shape, f, j, f + j * self.level_weight)
+            )
+        return sorted(
+            scores, key=lambda score: (score.score, -score.candidate.corr)
+        )
+
+
+class LoopPrior(ty.NamedTuple):
+    """Expected loop points, e.g. of the neighbouring note.
+
+    Attributes
+    ----------
+    start : float
+        offset from the selection start in seconds
+    end : float
+        offset from the selection end in seconds
+    tolerance : float
+        how far from start and end to search, in seconds
+    """
+
+    start: float
+    end: float
+    tolerance: float = 0.05
+
+
 class LoopFinder:
 
     def __init__(
         self,
-        item_handler: ItemsHandler,
+        item_handler: ty.Union[ItemsHandler, DetachedItems],
+        combine: ty.Optional[str] = None,
+        weights: ty.Optional[ty.Sequence[float]] = None,
     ) -> None:
+        """
+        Parameters
+        ----------
+        item_handler : Union[ItemsHandler, DetachedItems]
+        combine : Optional[str], optional
+            If None — mono sum of items is correlated. Otherwise every item
+            (mic track) is correlated separately, and curves are combined
+            by 'min' or weighted 'mean', see `CorrelationEngine`.
+        weights : Optional[Sequence[float]], optional
+            items weights for 'mean' combine
+        """
         self._handler = item_handler
         self.sr = self._handler.sr
+        self.combine = combine
+        self.weights = weights
+        # loop length constraint: period and tolerance in seconds
+        self._period: ty.Optional[ty.Tuple[float, float]] = None
+        self._period_spl: ty.Optional[ty.Tuple[float, float]] = None
+        self._rates: ty.Dict[int, ty.Union[ItemsHandler, DetachedItems]] = {}
+        # search bounds: offsets from selection start and end in seconds
+        self._bounds: ty.Optional[ty.Tuple[float, float]] = None
 
     def load_audio(self) -> ty.Iterable[float]:
         return self._handler.load_audio(mono=True)[0]  # type:ignore
 
-    def _find_best_start_idxes(
-        self, ar: np.array, slide_wind_spl: int, corr_wind_spl: int,
-        corr_treshold: float
-    ) -> ty.Tuple[float, int]:
-        out = np.zeros(slide_wind_spl, float)
-
-        # print(-e_ofst, -(e_ofst + corr_wind_spl), len(ar))
-        for i in range(slide_wind_spl):
-            # print(i, corr_wind_spl, i + corr_wind_spl)
-            # print(ar)
-            start = ar[i:i + corr_wind_spl]
-            end = ar[-(i + corr_wind_spl
-                       ):-i] if i > 0 else ar[-(i + corr_wind_spl):]
-            # print(start, end)
-            out[i] = np.corrcoef(start, end)[0][1]
-            if out[i] >= corr_treshold:
-                break
+    def _crop_spl(self, sr: int) -> ty.Tuple[int, int]:
+        """Get search bounds in samples: cropped from start and end."""
+        if self._bounds is None:
+            return 0, 0
+        head, tail = (
+            max(0, int(lr.core.time_to_samples(bound, sr=sr)))
+            for bound in self._bounds
+        )
+        return head, tail
 
-        max_i = np.argmax(out)
-        return out[max_i], max_i
+    def _engine(
+        self, handler: ty.Union[ItemsHandler, DetachedItems]
+    ) -> CorrelationEngine:
+        """Make engine of handler audio, cropped to the search bounds."""
+        if self.combine is None:
+            audio = handler.load_audio(mono=True)[0]
+        else:
+            audio = handler.load_audio(mono=False)
+        head, tail = self._crop_spl(handler.sr)
+        audio = audio[head:len(audio) - tail]  # type:ignore
+        if self.combine is None:
+            return CorrelationEngine(audio)
+        return CorrelationEngine(audio, self.combine, self.weights)
 
-    def _find_best_tail_pos(
-        self, ar: np.array, s_w_spl: int, c_w_spl: int, s_ofst: int,
-        corr_treshold: float
-    ) -> ty.Tuple[float, int]:
-        out = np.zeros(s_w_spl, float)
+    def _at_rate(self, rate: int) -> ty.Union[ItemsHandler, DetachedItems]:
+        """Get handler of the same items at rate, keeping its audio."""
+        if rate not in self._rates:
+            self._rates[rate] = self._handler.with_sr(rate)
+        return self._rates[rate]
 
-        start = ar[s_ofst:s_ofst + c_w_spl]
-        for i in range(s_w_spl):
-            end = ar[-(i + c_w_spl):-i] if i > 0 else ar[-(i + c_w_spl):],
-            out[i] = np.corrcoef(start, end)[0][1]
-            if out[i] >= corr_treshold:
-                break
+    def get_zero_crossings(self) -> 'ZeroCrossingIndex':
+        """Get zero crossings index of audio at the source samplerate."""
+        return self._at_rate(self._handler.source_sr).get_feature(
+            'zero_crossings', ZeroCrossingIndex
+        )
+
+    def score_seams(
+        self,
+        found: ty.Sequence[LoopCandidate],
+        crs_length: float,
+        shapes: ty.Optional[ty.Iterable[int]] = None,
+    ) -> ty.List[SeamScore]:
+        """Score crossfaded seams of candidates with every fade shape.
 
-        max_i = np.argmax(out)
-        return out[max_i], max_i
+        Nothing is changed in the project, seams are rendered in memory,
+        see `SeamRenderer`.
+
+        Parameters
+        ----------
+        found : Sequence[LoopCandidate]
+        crs_length : float
+            crossfade length in seconds
+        shapes : Optional[Iterable[int]], optional
+            Reaper fade shapes, all of FADE_CURVES if None
+
+        Returns
+        -------
+        List[SeamScore]
+            the best first
+        """
+        return SeamRenderer(self.load_audio(), self.sr).score(
+            found, crs_length, shapes
+        )
+
+    def snap(self, found: ty.List[LoopCandidate],
+             radius: float) -> ty.List[LoopCandidate]:
+        """Move loop points of candidates to matching zero crossings.
+
+        Parameters
+        ----------
+        found : List[LoopCandidate]
+        radius : float
+            how far loop points can be moved, in seconds
+
+        Returns
+        -------
+        List[LoopCandidate]
+            with start and end at the source samplerate grid
+        """
+        sr = self._handler.source_sr
+        index = self.get_zero_crossings()
+        length = index.length
+        starts = np.array([
+            lr.core.time_to_samples(cand.start, sr=sr) for cand in found
+        ])
+        seams = length - np.array([
+            lr.core.time_to_samples(cand.end, sr=sr) for cand in found
+        ])
+        starts, seams = index.snap(
+            starts, seams, int(lr.core.time_to_samples(radius, sr=sr))
+        )
+        return [
+            cand._replace(
+                start=lr.samples_to_time(start, sr=sr),
+                end=lr.samples_to_time(length - seam, sr=sr),
+            ) for cand, start, seam in zip(found, starts, seams)
+        ]
+
+    def _find_best_tail_pos(
+        self, engine: CorrelationEngine, e_idxes: np.ndarray, c_w_spl: int,
+        s_ofst: int, corr_treshold: float
+    ) -> ty.Tuple[float, int]:
+        ends = len(engine) - c_w_spl - e_idxes
+        if self._period_spl is not None:
+            allowed = _period_mask(ends - s_ofst, *self._period_spl)
+            if allowed.any():
+                e_idxes, ends = e_idxes[allowed], ends[allowed]
+        curve = engine.fixed_curve(s_ofst, ends, c_w_spl)
+        corr, idx = _pick(curve, corr_treshold)
+        return corr, int(e_idxes[idx])
 
     def _find_best_start_pos(
-        self, ar: np.array, s_w_spl: int, c_w_spl: int, e_ofst: int,
-        corr_treshold: float
+        self, engine: CorrelationEngine, s_idxes: np.ndarray, c_w_spl: int,
+        e_ofst: int, corr_treshold: float
     ) -> ty.Tuple[float, int]:
-        out = np.zeros(s_w_spl, float)
-
-        # print(-e_ofst, -(e_ofst + c_w_spl), len(ar))
-        end = ar[-(e_ofst + c_w_spl):-e_ofst]
-        for i in range(s_w_spl):
-            start = ar[i:i + c_w_spl]
-            # print(start, end)
-            out[i] = np.corrcoef(start, end)[0][1]
-            if out[i] >= corr_treshold:
+        end = len(engine) - c_w_spl - e_ofst
+        if self._period_spl is not None:
+            allowed = _period_mask(end - s_idxes, *self._period_spl)
+            if allowed.any():
+                s_idxes = s_idxes[allowed]
+        curve = engine.fixed_curve(end, s_idxes, c_w_spl)
+        corr, idx = _pick(curve, corr_treshold)
+        return corr, int(s_idxes[idx])
+
+    def _alternate(
+        self,
+        engine: CorrelationEngine,
+        c_w_spl: int,
+        s_idxes: np.ndarray,
+        e_idxes: np.ndarray,
+        start_idx: int,
+        corr_treshold: float,
+        max_tries: int = 20,
+    ) -> _Candidate:
+        """Move tail and start in turn, until they stop moving.
+
+        Parameters
+        ----------
+        engine : CorrelationEngine
+        c_w_spl : int
+            correlation window in samples
+        s_idxes : np.ndarray
+            allowed start offsets (from the selection start)
+        e_idxes : np.ndarray
+            allowed tail offsets (from the selection end)
+        start_idx : int
+            initial start offset
+        corr_treshold : float
+            search stops when correlation is over it. Pass np.inf to
+            converge to the local best.
+        max_tries : int, optional
+
+        Returns
+        -------
+        _Candidate
+        """
+        last_s, last_e = -1, -1
+        s_corr, e_idx = 0.0, 0
+        for _ in range(max_tries):
+            _, e_idx = self._find_best_tail_pos(
+                engine,
+                e_idxes,
+                c_w_spl,
+                s_ofst=start_idx,
+                corr_treshold=corr_treshold
+            )
+            s_corr, start_idx = self._find_best_start_pos(
+                engine,
+                s_idxes,
+                c_w_spl,
+                e_ofst=e_idx,
+                corr_treshold=corr_treshold
+            )
+            if last_s == start_idx and last_e == e_idx:
+                break
+            if s_corr >= corr_treshold:
                 break
+            last_s, last_e = start_idx, e_idx
+        return _Candidate(s_corr, start_idx, e_idx)
+
+    def _start_stage(self, corr_wind_sec: float, slide_wind_sec: float,
+                     sr: int, length: int) -> ty.Tuple[int, int]:
+        """Get windows in samples, and set period constraint for the sr."""
+        self._period_spl = None if self._period is None else (
+            self._period[0] * sr, self._period[1] * sr
+        )
+        corr_wind_spl = lr.core.time_to_samples(corr_wind_sec, sr=sr)
+        slide_wind_spl = lr.core.time_to_samples(slide_wind_sec, sr=sr)
+        if length < slide_wind_spl + corr_wind_spl:
+            raise LoopError(
+                'selection is shorter than correlation and slide windows'
+            )
+        return int(corr_wind_spl), int(slide_wind_spl)
+
+    def _pyramid_rates(self, pyramid: ty.Sequence[int]) -> ty.List[int]:
+        native = self._handler.source_sr
+        rates = sorted(set(int(rate) for rate in pyramid if rate < native))
+        return rates + [native]
+
+    def _search_full(
+        self,
+        corr_wind_sec: float,
+        slide_wind_sec: float,
+        corr_treshold: float,
+        candidates: int,
+    ) -> ty.Tuple[ty.List[_Candidate], int, int]:
+        """Search over the whole slide window at the handler samplerate.
+
+        Returns
+        -------
+        Tuple[List[_Candidate], int, int]
+            the best candidates, samplerate and correlation window
+        """
+        engine = self._engine(self._handler)
+        c_w, s_w = self._start_stage(
+            corr_wind_sec, slide_wind_sec, self.sr, len(engine)
+        )
+        found = self._search_seeds(engine, c_w, s_w, corr_treshold, candidates)
+        return found, self.sr, c_w
+
+    def _search_seeds(
+        self, engine: CorrelationEngine, c_w: int, s_w: int,
+        corr_treshold: float, candidates: int
+    ) -> ty.List[_Candidate]:
+        """Alternate from the best peaks of the mirrored curve.
+
+        The first seed is the same as single search takes: the first
+        value over corr_treshold, or the best one. If only one candidate
+        is needed, the curve is computed up to that value.
+        """
+        allowed = None
+        if self._period_spl is not None:
+            lengths = len(engine) - c_w - 2 * np.arange(s_w)
+            allowed = _period_mask(lengths, *self._period_spl)
+            if not allowed.any():
+                allowed = None
+        curve = engine.mirrored_curve(
+            s_w, c_w, corr_treshold if candidates == 1 else None, allowed
+        )
+        _, start_idx = _pick(curve, corr_treshold)
+        min_distance = max(1, c_w // 4)
+        idxes = np.arange(s_w)
+        found = [
+            self._alternate(engine, c_w, idxes, idxes, start, corr_treshold)
+            for start in _top_peaks(
+                curve, candidates, min_distance, first=start_idx
+            )
+        ]
+        return _suppress(found, candidates, min_distance)
+
+    def _search_pyramid(
+        self,
+        corr_wind_sec: float,
+        slide_wind_sec: float,
+        corr_treshold: float,
+        pyramid: ty.Sequence[int],
+        candidates: int,
+    ) -> ty.Tuple[ty.List[_Candidate], int, int]:
+        """Search on decimated signal, refine the best at higher rates.
+
+        Returns
+        -------
+        Tuple[List[_Candidate], int, int]
+            the best candidates, samplerate and correlation window
+            of the last stage
+        """
+        rates = self._pyramid_rates(pyramid)
+        rate = rates[0]
+        engine = self._engine(self._at_rate(rate))
+        c_w, s_w = self._start_stage(
+            corr_wind_sec, slide_wind_sec, rate, len(engine)
+        )
+        found = self._search_seeds(engine, c_w, s_w, corr_treshold, candidates)
+        for new_rate in rates[1:]:
+            ratio = new_rate / rate
+            radius = int(np.ceil(ratio)) * 2 + 2
+            rate = new_rate
+            engine = self._engine(self._at_rate(rate))
+            c_w, s_w = self._start_stage(
+                corr_wind_sec, slide_wind_sec, rate, len(engine)
+            )
+            refined = []
+            for cand in found:
+                start = int(round(cand.start_idx * ratio))
+                e_idx = int(round(cand.e_idx * ratio))
+                refined.append(
+                    self._alternate(
+                        engine,
+                        c_w,
+                        _neighbourhood(start, radius, s_w),
+                        _neighbourhood(e_idx, radius, s_w),
+                        start,
+                        corr_treshold=np.inf,
+                    )
+                )
+            found = _suppress(refined, candidates, radius)
+        return found, rate, c_w
+
+    def _search_prior(
+        self,
+        corr_wind_sec: float,
+        slide_wind_sec: float,
+        prior: LoopPrior,
+        pyramid: ty.Optional[ty.Sequence[int]],
+    ) -> ty.Tuple[ty.List[_Candidate], int, int]:
+        """Search only around the prior loop points.
+
+        The search is made at the rate, the full search would finish at:
+        native samplerate for pyramid and handler samplerate otherwise.
+
+        Returns
+        -------
+        Tuple[List[_Candidate], int, int]
+            the best candidate, samplerate and correlation window
+        """
+        rate = self._pyramid_rates(pyramid)[-1] if pyramid else self.sr
+        engine = self._engine(self._at_rate(rate))
+        c_w, s_w = self._start_stage(
+            corr_wind_sec, slide_wind_sec, rate, len(engine)
+        )
+        radius = int(lr.core.time_to_samples(prior.tolerance, sr=rate))
+        head, tail = self._crop_spl(rate)
+        start = int(lr.core.time_to_samples(prior.start, sr=rate)) - head
+        e_idx = int(lr.core.time_to_samples(prior.end, sr=rate)) - c_w - tail
+        best = self._alternate(
+            engine,
+            c_w,
+            _neighbourhood(start, radius, s_w),
+            _neighbourhood(e_idx, radius, s_w),
+            min(max(start, 0), s_w - 1),
+            corr_treshold=np.inf,
+        )
+        return [best], rate, c_w
+
+    def get_loop_candidates(
+        self,
+        corr_wind_sec: float,
+        slide_wind_sec: float,
+        corr_treshold: float = 0.965,
+        candidates: int = 5,
+        pyramid: ty.Optional[ty.Sequence[int]] = None,
+        prior: ty.Optional[LoopPrior] = None,
+        period: ty.Optional[float] = None,
+        period_tolerance: float = 0.005,
+        snap_radius: ty.Optional[float] = None,
+        bounds: ty.Optional[ty.Tuple[float, float]] = None,
+    ) -> ty.List[LoopCandidate]:
+        """Get the best loop points in seconds, from one search.
+
+        Seeds are taken from peaks of the mirrored correlation curve
+        with non-maximum suppression, each one is refined by moving
+        tail and start in turn. Candidates, which converged to the
+        same loop, are suppressed.
+
+        Parameters
+        ----------
+        corr_wind_sec : float
+            How long the start and end should look seem.
+        slide_wind_sec : float
+            How large looking area is
+        corr_treshold : float, optional
+            How close should be start and end: 1.0 is exactly the same.
+        candidates : int, optional
+            How many candidates to get (and to keep between pyramid
+            stages).
+        pyramid : Optional[Sequence[int]], optional
+            Samplerates of coarse-to-fine search, see `get_loop`.
+        prior : Optional[LoopPrior], optional
+            If given, only its neighbourhood is searched first. If the
+            correlation found there is over corr_treshold, it is the only
+            candidate returned, otherwise the full search is made.
+        period : Optional[float], optional
+            Modulation (tremolo, vibrato) period in seconds, see
+            `get_modulation_period`. If given, only loops of whole number
+            of periods are scored.
+        period_tolerance : float, optional
+            Allowed difference of loop length from whole number of
+            periods, in seconds.
+        snap_radius : Optional[float], optional
+            If given, loop points are moved to matching zero crossings
+            at the source samplerate within this radius (in seconds),
+            see `ZeroCrossingIndex.snap`.
+        bounds : Optional[Tuple[float, float]], optional
+            Offsets from the selection start and end in seconds, the search
+            is made between (e.g. sustain of note, see `find_sustain`).
+            Slide windows start from these bounds, while returned points
+            are still relative to the selection edges.
+
+        Returns
+        -------
+        List[LoopCandidate]
+            the best first, may be shorter than candidates
 
-        max_i = np.argmax(out)
-        return out[max_i], max_i
+        Raises
+        ------
+        LoopError
+            If selection is too short for the windows.
+        """
+        self._period = None if period is None else (period, period_tolerance)
+        self._bounds = bounds
+        found: ty.List[_Candidate] = []
+        if prior is not None:
+            found, sr, corr_wind_spl = self._search_prior(
+                corr_wind_sec, slide_wind_sec, prior, pyramid
+            )
+        if not found or found[0].corr < corr_treshold:
+            if pyramid:
+                found, sr, corr_wind_spl = self._search_pyramid(
+                    corr_wind_sec, slide_wind_sec, corr_treshold, pyramid,
+                    candidates
+                )
+            else:
+                found, sr, corr_wind_spl = self._search_full(
+                    corr_wind_sec, slide_wind_sec, corr_treshold, candidates
+                )
+        head, tail = self._crop_spl(sr)
+        result = [
+            LoopCandidate(
+                lr.samples_to_time(cand.start_idx + head, sr=sr),
+                lr.samples_to_time(cand.e_idx + corr_wind_spl + tail, sr=sr),
+                cand.corr,
+            ) for cand in found
+        ]
+        if snap_radius is not None:
+            result = self.snap(result, snap_radius)
+        return result
 
     def get_loop(
         self,
@@ -86,6 +1370,12 @@ class LoopFinder:
         # crossfade_length: float,
         corr_treshold: float = 0.965,
         corr_min_treshold: float = 0.86,
+        pyramid: ty.Optional[ty.Sequence[int]] = None,
+        candidates: int = 3,
+        prior: ty.Optional[LoopPrior] = None,
+        period: ty.Optional[float] = None,
+        snap_radius: ty.Optional[float] = None,
+        bounds: ty.Optional[ty.Tuple[float, float]] = None,
     ) -> ty.Tuple[float, float]:
         """Get loop start and end points in seconds.
 
@@ -99,58 +1389,54 @@ class LoopFinder:
             How close should be start and end: 1.0 is exactly the same.
         corr_min_treshold : float, optional
             Which correlation counted as total fail.
+        pyramid : Optional[Sequence[int]], optional
+            Samplerates of coarse-to-fine search, e.g. (4000, 11025).
+            The whole slide window is searched at the lowest rate only,
+            then neighbourhoods of the best candidates are refined at the
+            next rates, and, finally, at the native samplerate of source.
+            If None — the whole search is made at the handler samplerate.
+        candidates : int, optional
+            How many candidates are kept between pyramid stages.
+        prior : Optional[LoopPrior], optional
+            Expected loop points (e.g. of the previous note). Its
+            neighbourhood is searched first, the whole slide window
+            is searched only if correlation there is below corr_treshold.
+        period : Optional[float], optional
+            Modulation period in seconds: loop length is kept to whole
+            number of periods, see `get_modulation_period`.
+        snap_radius : Optional[float], optional
+            If given, loop points are snapped to matching zero crossings
+            within this radius (in seconds).
+        bounds : Optional[Tuple[float, float]], optional
+            Offsets from the selection start and end in seconds, the search
+            is made between, see `get_loop_candidates`.
 
         Returns
         -------
         Tuple[float, float]
             start, end
         """
-        ar = self.load_audio()
-        corr_wind_spl = lr.core.time_to_samples(corr_wind_sec, sr=self.sr)
-        slide_wind_spl = lr.core.time_to_samples(slide_wind_sec, sr=self.sr)
-        print('sample values:', corr_wind_spl, slide_wind_spl)
-
-        best_corr, start_idx = self._find_best_start_idxes(
-            ar, slide_wind_spl, corr_wind_spl, corr_treshold=corr_treshold
+        found = self.get_loop_candidates(
+            corr_wind_sec,
+            slide_wind_sec,
+            corr_treshold=corr_treshold,
+            candidates=candidates if pyramid else 1,
+            pyramid=pyramid,
+            prior=prior,
+            period=period,
+            snap_radius=snap_radius,
+            bounds=bounds,
         )
-        print(best_corr, start_idx)
-        max_tries = 20
-        last_s, last_e = 0, 0
-        for i in range(max_tries):
-            print(f'try {i}')
-            e_corr, e_idx = self._find_best_tail_pos(
-                ar,
-                slide_wind_spl,
-                corr_wind_spl,
-                s_ofst=start_idx,
-                corr_treshold=corr_treshold
-            )
-            print(e_corr, e_idx)
-            s_corr, start_idx = self._find_best_start_pos(
-                ar,
-                slide_wind_spl,
-                corr_wind_spl,
-                e_ofst=e_idx,
-                corr_treshold=corr_treshold
-            )
-            print(s_corr, start_idx)
-            if last_s == start_idx and last_e == e_idx:
-                break
-            if s_corr >= corr_treshold:
-                break
-            last_s, last_e = start_idx, e_idx
-        if s_corr < corr_min_treshold:
+        best = found[0]
+        if best.corr < corr_min_treshold:
             raise LoopError(
                 (
-                    f'correlation with this selection is {s_corr}. '
+                    f'correlation with this selection is {best.corr}. '
                     f'Which is below the target quality: {corr_min_treshold}'
                 )
             )
-
-        time_st = lr.samples_to_time(start_idx, sr=self.sr)
-        time_end = lr.samples_to_time(e_idx + corr_wind_spl, sr=self.sr)
         # self._cut_and_fade(time_st, time_end, crossfade_length)
-        return time_st, time_end
+        return best.start, best.end
 
 
 class LoopSlicer:
@@ -276,3 +1562,231 @@ class LoopSlicer:
             itms_hdlr_end.fade_in(crs_length)
             self._pr.end_undo_block('cut and fade loop')
         return reg
+
+
+class LoopJob(ty.NamedTuple):
+    """Arguments of loop search for one note, sent to worker process."""
+
+    items: DetachedItems
+    corr_wind_sec: float
+    slide_wind_sec: float
+    corr_treshold: float
+    pyramid: ty.Optional[ty.Sequence[int]]
+    prior_tolerance: ty.Optional[float] = None
+    periodic: bool = False
+    snap_radius: ty.Optional[float] = None
+    crs_length: ty.Optional[float] = None
+    combine: ty.Optional[str] = None
+    auto_windows: bool = False
+    use_f0: bool = True
+
+
+class LoopResult(ty.NamedTuple):
+    """Result of loop search for one note.
+
+    Attributes
+    ----------
+    start : float
+        offset from the selection start
+    end : float
+        offset from the selection end
+    corr : float
+    seconds : float
+        time, spent on the search
+    error : Optional[str]
+        message of LoopError, if search failed
+    shape : Optional[int]
+        the best fade shape, if seams were scored
+    """
+
+    start: float
+    end: float
+    corr: float
+    seconds: float
+    error: ty.Optional[str] = None
+    shape: ty.Optional[int] = None
+
+
+def _search_job(
+    job: LoopJob, prior: ty.Optional[LoopPrior] = None
+) -> LoopResult:
+    """Search loop of one note, runs in worker process."""
+    start = time.perf_counter()
+    period, bounds = None, None
+    corr_wind_sec, slide_wind_sec = job.corr_wind_sec, job.slide_wind_sec
+    # the same cached features as single note search uses
+    if job.periodic:
+        period = get_modulation_period(job.items)
+    if job.auto_windows:
+        region = get_sustain_region(job.items, use_f0=job.use_f0)
+        if region is not None:
+            bounds = region.start, region.end
+            corr_wind_sec = region.corr_wind_sec
+            slide_wind_sec = region.slide_wind_sec
+    finder = LoopFinder(job.items, combine=job.combine)
+    try:
+        found = finder.get_loop_candidates(
+            corr_wind_sec,
+            slide_wind_sec,
+            corr_treshold=job.corr_treshold,
+            candidates=3 if job.pyramid or job.crs_length else 1,
+            pyramid=job.pyramid,
+            prior=prior,
+            period=period,
+            snap_radius=job.snap_radius,
+            bounds=bounds,
+        )
+    except LoopError as e:
+        return LoopResult(0.0, 0.0, 0.0, time.perf_counter() - start, str(e))
+    best, shape = found[0], None
+    if job.crs_length:
+        seam = finder.score_seams(found, job.crs_length)[0]
+        best, shape = seam.candidate, seam.shape
+    return LoopResult(
+        best.start, best.end, best.corr, time.perf_counter() - start,
+        shape=shape
+    )
+
+
+def _search_chunk(
+    jobs: ty.List[LoopJob],
+    progress: ty.Optional[ty.Callable[[int, LoopResult], None]] = None,
+) -> ty.List[LoopResult]:
+    """Search loops of contiguous notes, runs in worker process.
+
+    Every found loop is used as prior for the next note, if the job
+    has prior_tolerance.
+    """
+    results: ty.List[LoopResult] = []
+    prior: ty.Optional[LoopPrior] = None
+    for job in jobs:
+        result = _search_job(job, prior)
+        if progress is not None:
+            progress(len(results), result)
+        results.append(result)
+        if job.prior_tolerance is None or result.error is not None:
+            prior = None
+            continue
+        prior = LoopPrior(result.start, result.end, job.prior_tolerance)
+    return results
+
+
+def _split_contiguous(jobs: ty.List[LoopJob],
+                      parts: int) -> ty.List[ty.List[LoopJob]]:
+    """Split jobs into at most `parts` contiguous chunks of equal size."""
+    size = -(-len(jobs) // max(1, parts))
+    return [jobs[idx:idx + size] for idx in range(0, len(jobs), size)]
+
+
+def make_loops(
+    handler: ItemsHandler,
+    corr_wind_sec: float,
+    slide_wind_sec: float,
+    crs_length: float = .1,
+    crs_shape: int = 0,
+    corr_treshold: float = 0.965,
+    corr_min_treshold: float = 0.86,
+    pyramid: ty.Optional[ty.Sequence[int]] = None,
+    workers: ty.Optional[int] = None,
+    prior_tolerance: ty.Optional[float] = 0.05,
+    periodic: bool = False,
+    snap_radius: ty.Optional[float] = None,
+    score_seams: bool = False,
+    combine: ty.Optional[str] = None,
+    auto_windows: bool = False,
+    use_f0: bool = True,
+    progress: ty.Optional[ty.Callable[[int, LoopResult], None]] = None,
+) -> ty.List[ty.Tuple[ItemsHandler, LoopResult]]:
+    """Make loops of every items group (note) of handler.
+
+    Items are grouped by `ItemsHandler.split_by_items_gaps`. Loops are
+    searched in process pool, then all groups are cut and faded inside
+    one undo block. Groups, which correlation is below corr_min_treshold
+    are left untouched.
+
+    Parameters
+    ----------
+    handler : ItemsHandler
+    corr_wind_sec : float
+    slide_wind_sec : float
+    crs_length : float, optional
+    crs_shape : int, optional
+    corr_treshold : float, optional
+    corr_min_treshold : float, optional
+    pyramid : Optional[Sequence[int]], optional
+        see `LoopFinder.get_loop`
+    workers : Optional[int], optional
+        Amount of processes. If None — number of processors,
+        1 means serial search in the current process.
+    prior_tolerance : Optional[float], optional
+        Notes are split into one contiguous chunk per process, and loop
+        of the previous note in chunk is searched first within
+        this tolerance (in seconds), see `LoopPrior`.
+        If None — every note is searched from scratch.
+    periodic : bool, optional
+        If True — tremolo period is estimated for every note, and its
+        loop length is kept to whole number of periods.
+    snap_radius : Optional[float], optional
+        If given, loop points are snapped to matching zero crossings
+        within this radius (in seconds).
+    score_seams : bool, optional
+        If True — seams of several candidates are rendered in memory
+        with every fade shape, and the best one is made (crs_shape
+        is ignored), see `SeamRenderer`.
+    combine : Optional[str], optional
+        If given — every item (mic) is correlated separately, see
+        `LoopFinder`.
+    auto_windows : bool, optional
+        If True — sustain of every note is detected, search is bounded
+        by it, and windows are fitted to it (corr_wind_sec and
+        slide_wind_sec are used only if there is no sustain),
+        see `find_sustain`.
+    use_f0 : bool, optional
+        If True — pitch of detected sustain should be steady as well,
+        see `get_sustain_region`.
+    progress : Optional[Callable[[int, LoopResult], None]], optional
+        called with group index and its result, as soon as the result
+        reaches the current process (with workers — chunk by chunk)
+
+    Returns
+    -------
+    List[Tuple[ItemsHandler, LoopResult]]
+        every group with its result
+    """
+    with rpr.inside_reaper():
+        groups = handler.split_by_items_gaps()
+        detached = [group.detach() for group in groups]
+    # regions are decoded once here and sent to workers with the jobs
+    jobs = [
+        LoopJob(
+            items.preload(), corr_wind_sec, slide_wind_sec, corr_treshold,
+            pyramid, prior_tolerance, periodic, snap_radius,
+            crs_length if score_seams else None, combine, auto_windows,
+            use_f0
+        ) for items in detached
+    ]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) < 2:
+        results = _search_chunk(jobs, progress)
+    else:
+        results = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for chunk in executor.map(
+                _search_chunk, _split_contiguous(jobs, workers)
+            ):
+                for result in chunk:
+                    if progress is not None:
+                        progress(len(results), result)
+                    results.append(result)
+    with rpr.inside_reaper():
+        pr = handler.pr
+        pr.begin_undo_block()
+        for group, result in zip(groups, results):
+            if result.error is not None or result.corr < corr_min_treshold:
+                continue
+            LoopSlicer(group, LoopFinder(group)).cut_and_fade(
+                result.start, result.end, crs_length,
+                crs_shape if result.shape is None else result.shape
+            )
+        pr.end_undo_block('make loops')
+    return list(zip(groups, results))
@@ -17,11 +17,135 @@ def db_to_amplitude(db: float) -> float:
     return 10**(db / 20)
 
 
-def _get_entire_rms(audio: ty.Iterable[float]) -> float:
-    square = np.square(audio)
-    mean = np.mean(square)
-    root = math.sqrt(mean)
-    return root
+def _window_samples(
+    items_handler: ItemsHandler, index: np.ndarray,
+    start: ty.Optional[float], end: ty.Optional[float]
+) -> ty.Tuple[int, int]:
+    n_samples = len(index) - 1
+    first = 0 if start is None else int(round(start * items_handler.sr))
+    last = n_samples if end is None else int(round(end * items_handler.sr))
+    first = min(n_samples, max(0, first))
+    return first, min(n_samples, max(first, last))
+
+
+def get_window_energy(
+    items_handler: ItemsHandler,
+    start: ty.Optional[float] = None,
+    end: ty.Optional[float] = None,
+    mono: bool = True,
+) -> ty.Union[float, np.ndarray]:
+    """Get sum of squared samples between start and end.
+
+    Uses `ItemsHandler.get_energy_index`, so every query after the first
+    one costs constant time.
+
+    Parameters
+    ----------
+    items_handler : ItemsHandler
+    start : Optional[float], optional
+        seconds from the items start, None is the start
+    end : Optional[float], optional
+        seconds from the items start, None is the end
+    mono : bool, optional
+        If False — energy is returned per channel
+
+    Returns
+    -------
+    Union[float, np.ndarray]
+    """
+    index = items_handler.get_energy_index(mono=mono)
+    first, last = _window_samples(items_handler, index, start, end)
+    energy = index[last] - index[first]
+    if mono:
+        return float(energy)
+    return energy  # type:ignore
+
+
+def get_window_rms(
+    items_handler: ItemsHandler,
+    start: ty.Optional[float] = None,
+    end: ty.Optional[float] = None,
+    mono: bool = True,
+) -> ty.Union[float, np.ndarray]:
+    """Get RMS between start and end in constant time.
+
+    Parameters
+    ----------
+    items_handler : ItemsHandler
+    start : Optional[float], optional
+        seconds from the items start, None is the start
+    end : Optional[float], optional
+        seconds from the items start, None is the end
+    mono : bool, optional
+        If False — RMS is returned per channel
+
+    Returns
+    -------
+    Union[float, np.ndarray]
+        0.0 for the empty window
+    """
+    index = items_handler.get_energy_index(mono=mono)
+    first, last = _window_samples(items_handler, index, start, end)
+    energy = np.maximum(0.0, index[last] - index[first])
+    rms = np.sqrt(energy / max(1, last - first))
+    if mono:
+        return float(rms)
+    return rms  # type:ignore
+
+
+def get_median_rms(
+    items_handler: ItemsHandler,
+    frame_length: int = 2048,
+    hop_length: int = 512
+) -> float:
+    """Get median of RMS frames from the cached sorted frames.
+
+    Parameters
+    ----------
+    items_handler : ItemsHandler
+    frame_length : int, optional
+    hop_length : int, optional
+
+    Returns
+    -------
+    float
+    """
+    frames = items_handler.get_sorted_rms_frames(frame_length, hop_length)
+    middle = len(frames) // 2
+    if len(frames) % 2:
+        return float(frames[middle])
+    return float((frames[middle - 1] + frames[middle]) / 2)
+
+
+def _frames_window(
+    n_frames: int, hop_length: int, sr: int, start_offset: ty.Optional[float],
+    end_offset: ty.Optional[float]
+) -> ty.Tuple[int, int]:
+    """Get range of centered frames, laying inside the window.
+
+    Parameters
+    ----------
+    n_frames : int
+    hop_length : int
+    sr : int
+    start_offset : Optional[float]
+        in seconds, if None or 0 — from the start
+    end_offset : Optional[float]
+        in seconds, if None or 0 — up to the end
+
+    Returns
+    -------
+    Tuple[int, int]
+        first frame, last frame (exclusive). At least one frame.
+    """
+    first, last = 0, n_frames
+    if start_offset:
+        start_spl = lr.time_to_samples(start_offset, sr=sr)
+        first = min(n_frames - 1, max(0, -(-start_spl // hop_length)))
+    if end_offset:
+        end_spl = lr.time_to_samples(end_offset, sr=sr)
+        last = min(n_frames, max(0, -(-end_spl // hop_length)))
+    return first, max(last, first + 1)
 
 
 def get_rms(items_handler: ItemsHandler, median: bool = False) -> float:
@@ -33,12 +157,162 @@ def get_rms(items_handler: ItemsHandler, median: bool = False) -> float:
     median : bool, optional
         Default to False. If needed not entire RMS but median value.
     """
-    audio = items_handler.load_audio()[0]
     if not median:
-        return _get_entire_rms(audio)
-    rms = lr.feature.rms(y=audio)
-    median_rms = ty.cast(float, np.median(rms))
-    return median_rms
+        return ty.cast(float, get_window_rms(items_handler))
+    return get_median_rms(items_handler)
+
+
+class RmsQuery(ty.NamedTuple):
+    """Single search window for `get_first_rms_values_ms`.
+
+    Fields have the same meaning as `get_first_rms_value_ms` arguments.
+    """
+
+    rms_target: float
+    below: bool = False
+    start_offset: ty.Optional[float] = None
+    end_offset: ty.Optional[float] = None
+    direction: str = 'right'
+    want_trend: bool = False
+
+
+def find_first_crossings(
+    rms: np.ndarray,
+    first: np.ndarray,
+    last: np.ndarray,
+    right: np.ndarray,
+    thresholds: np.ndarray,
+    below: np.ndarray,
+    min_run: np.ndarray,
+) -> np.ndarray:
+    """Find the first threshold crossing in many frame windows at once.
+
+    All windows are laid out as rows of one padded matrix, so the search
+    is made by a few NumPy passes instead of Python loop over frames.
+
+    Parameters
+    ----------
+    rms : np.ndarray
+        1-D frames
+    first : np.ndarray
+        first frame of every window
+    last : np.ndarray
+        last frame of every window (exclusive)
+    right : np.ndarray
+        bool, search from the first frame if True, from the last otherwise
+    thresholds : np.ndarray
+    below : np.ndarray
+        bool, look for frames <= threshold if True, >= otherwise
+    min_run : np.ndarray
+        how many consecutive frames should cross the threshold
+
+    Returns
+    -------
+    np.ndarray
+        Index of the first frame of the first run, counted from the
+        search edge. If there is no such run — the last index in window
+        (minus one, if min_run > 1).
+    """
+    first, last = np.asarray(first), np.asarray(last)
+    lengths = last - first
+    steps = np.arange(max(1, int(lengths.max(initial=1))))
+    valid = steps < lengths[:, None]
+    idxes = np.where(
+        np.asarray(right)[:, None], first[:, None] + steps,
+        last[:, None] - 1 - steps
+    )
+    values = rms[np.clip(idxes, 0, len(rms) - 1)]
+    thresholds = np.asarray(thresholds)[:, None]
+    hits = np.where(
+        np.asarray(below)[:, None], values <= thresholds,
+        values >= thresholds
+    ) & valid
+    # run-length of hits, ending at every frame
+    count = np.cumsum(hits, axis=1)
+    runs = count - np.maximum.accumulate(np.where(hits, 0, count), axis=1)
+    min_run = np.asarray(min_run)
+    done = runs >= min_run[:, None]
+    found = done.any(axis=1)
+    result = np.argmax(done, axis=1) - min_run + 1
+    not_found = lengths - 1
+    not_found = np.where(
+        (min_run > 1) & (not_found > 0), not_found - 1, not_found
+    )
+    return np.where(found, result, not_found)
+
+
+def get_first_rms_values_ms(
+    items_handler: ItemsHandler,
+    queries: ty.Sequence[RmsQuery],
+    hop_length_spl: int = 512,
+) -> np.ndarray:
+    """Get time in ms of the first rms crossing for many windows at once.
+
+    Parameters
+    ----------
+    items_handler : ItemsHandler
+    queries : Sequence[RmsQuery]
+    hop_length_spl : int, optional
+
+    Returns
+    -------
+    np.ndarray
+        For each query: offset from the start_offset (direction 'right')
+        or back from the end_offset (direction 'left'), as
+        `get_first_rms_value_ms` returns.
+
+    Raises
+    ------
+    TypeError
+        If direction is neither 'right' nor 'left'
+
+    Note
+    ----
+    RMS frames are taken from `ItemsHandler.get_rms_frames`, so frames of
+    the whole item are computed once for all queries with the same hop.
+    """
+    sr = items_handler.sr
+    for query in queries:
+        if query.direction not in ('right', 'left'):
+            raise TypeError(
+                'direction can be only "right" or "left". '
+                f'Here is: {query.direction}'
+            )
+    all_rms = items_handler.get_rms_frames(hop_length=hop_length_spl)
+    duration = len(items_handler.load_audio()[0]) / sr  # type:ignore
+    windows = np.array(
+        [
+            _frames_window(
+                len(all_rms), hop_length_spl, sr, query.start_offset,
+                query.end_offset
+            ) for query in queries
+        ],
+        dtype=int
+    ).reshape(-1, 2)
+    first, last = windows[:, 0], windows[:, 1]
+    right = np.array([query.direction == 'right' for query in queries])
+    index = find_first_crossings(
+        all_rms,
+        first,
+        last,
+        right,
+        np.array([query.rms_target for query in queries], dtype=float),
+        np.array([query.below for query in queries], dtype=bool),
+        np.array([2 if query.want_trend else 1 for query in queries]),
+    )
+    frame_times = lr.frames_to_time(
+        np.where(right, first + index, last - 1 - index),
+        sr=sr,
+        hop_length=hop_length_spl
+    )
+    start_offsets = np.array([query.start_offset or 0.0 for query in queries])
+    end_offsets = np.array(
+        [query.end_offset or duration for query in queries]
+    )
+    ms = np.where(
+        right, frame_times - start_offsets, end_offsets - frame_times
+    )
+    return np.maximum(0.0, ms)
 
 
 def get_first_rms_value_ms(
@@ -76,48 +350,27 @@ def get_first_rms_value_ms(
     -------
     float
         start offset from search area
+
+    Note
+    ----
+    Thin wrapper around `get_first_rms_values_ms`.
     """
-    audio = items_handler.load_audio()[0]
-    if start_offset:
-        st_ofst_spl = lr.time_to_samples(start_offset, items_handler.sr)
-        audio = audio[st_ofst_spl:]  # type:ignore
-    if end_offset:
-        end_ofst_spl = lr.time_to_samples(end_offset, items_handler.sr)
-        if start_offset:
-            end_ofst_spl -= st_ofst_spl
-        audio = audio[:end_ofst_spl]  # type:ignore
-    rms = lr.feature.rms(y=audio, hop_length=hop_length_spl)[0]
-    # print('RMS', rms, rms[::-1], sep='\n--')
-    if direction == 'right':
-        enum_ = enumerate(rms)
-    if direction == 'left':
-        enum_ = enumerate(rms[::-1])
-    else:
-        raise TypeError(
-            f'direction can be only "right" or "left". Here is: {direction}'
-        )
-    has_one = False
-    for index, val in enum_:
-        if val >= rms_target and not below:
-            if has_one or not want_trend:
-                break
-            has_one = True
-            continue
-        if val <= rms_target and below:
-            if has_one or not want_trend:
-                break
-            has_one = True
-            continue
-        has_one = False
-        # if index == len(rms):
-        #     raise ValueError('no rms above target')
-    if want_trend and index > 0:
-        index -= 1
-    ms = ty.cast(
-        float,
-        lr.frames_to_time(index, items_handler.sr, hop_length=hop_length_spl)
+    ms = float(
+        get_first_rms_values_ms(
+            items_handler,
+            [
+                RmsQuery(
+                    rms_target,
+                    below=below,
+                    start_offset=start_offset,
+                    end_offset=end_offset,
+                    direction=direction,
+                    want_trend=want_trend
+                )
+            ],
+            hop_length_spl=hop_length_spl
+        )[0]
     )
-    # print(ms, index)
     if want_marker:
         i_left, i_right = items_handler.get_bounds(count_ts=True)
         if direction == 'right':
@@ -150,8 +403,7 @@ def get_last_rms_value_ms(
         if None — no marker placed, if string — maker with name is placed
     items_handler : ItemsHandler
     """
-    audio = items_handler.load_audio()[0]
-    rms = lr.feature.rms(y=audio)[0]
+    rms = items_handler.get_rms_frames()
     for index, val in enumerate(reversed(rms)):
         if val >= rms_target:
             break
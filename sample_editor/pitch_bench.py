@@ -0,0 +1,256 @@
+"""Compare root estimation accuracy and speed of pitch engines.
+
+Run from the shell:
+
+    python -m sample_editor.pitch_bench
+    python -m sample_editor.pitch_bench cello_C2.wav vln.wav:A4 -e yin
+
+Without files only synthetic tones are measured. Recorded file is given as
+`path[:note]`, if note is omitted it's taken from the file name.
+"""
+import argparse
+from pathlib import Path
+import re
+import time
+import typing as ty
+
+import librosa as lr
+import numpy as np
+
+from .pitch_tracker import PITCH_ENGINES, PitchEngine, PitchError
+
+
+class BenchCase(ty.NamedTuple):
+    name: str
+    audio: np.ndarray
+    sr: int
+    note: str
+
+
+class BenchResult(ty.NamedTuple):
+    engine: str
+    case: str
+    expected: str
+    note: ty.Optional[str]
+    seconds: float
+
+    @property
+    def semitones(self) -> ty.Optional[int]:
+        """Error in semitones, None if nothing found."""
+        if self.note is None:
+            return None
+        return int(lr.note_to_midi(self.note) - lr.note_to_midi(self.expected))
+
+
+def synth_tone(
+    note: str,
+    sr: int,
+    duration: float = 1.5,
+    n_harmonics: int = 12,
+    vibrato_cents: float = 20.,
+    noise: float = .02,
+    fundamental: float = 1.,
+    seed: int = 0,
+) -> np.ndarray:
+    """Make harmonic tone with vibrato, attack, release and noise.
+
+    Parameters
+    ----------
+    note : str
+    sr : int
+    duration : float, optional
+        in seconds
+    n_harmonics : int, optional
+        harmonics above Nyquist are dropped
+    vibrato_cents : float, optional
+        depth of 5.5 Hz vibrato
+    noise : float, optional
+        white noise amplitude
+    fundamental : float, optional
+        amplitude of the first harmonic, the others are 1/h
+    seed : int, optional
+
+    Returns
+    -------
+    np.ndarray
+    """
+    t = np.arange(int(duration * sr)) / sr
+    f0 = lr.note_to_hz(note) * 2**(
+        vibrato_cents / 1200 * np.sin(2 * np.pi * 5.5 * t)
+    )
+    phase = 2 * np.pi * np.cumsum(f0) / sr
+    audio = np.zeros_like(t)
+    for harm in range(1, n_harmonics + 1):
+        if harm * f0.max() >= sr / 2:
+            break
+        amp = fundamental if harm == 1 else 1 / harm
+        audio += amp * np.sin(harm * phase)
+    envelope = np.minimum(1, np.minimum(t / .05, (duration - t) / .2))
+    rng = np.random.default_rng(seed)
+    audio = audio * envelope + noise * rng.standard_normal(len(t))
+    return (audio / np.abs(audio).max()).astype(np.float32)
+
+
+def synthetic_cases(
+    sr: int,
+    notes: ty.Sequence[str] = ('C2', 'F2', 'A#2', 'D#3', 'G#3', 'C#4', 'F#4',
+                               'B4', 'E5', 'A5'),
+) -> ty.List[BenchCase]:
+    """Get set of synthetic tones: plain, noisy and with weak fundamental.
+
+    Parameters
+    ----------
+    sr : int
+    notes : Sequence[str], optional
+
+    Returns
+    -------
+    List[BenchCase]
+    """
+    cases: ty.List[BenchCase] = []
+    for idx, note in enumerate(notes):
+        cases.append(
+            BenchCase(f'{note} plain', synth_tone(note, sr), sr, note)
+        )
+        cases.append(
+            BenchCase(
+                f'{note} noisy', synth_tone(note, sr, noise=.3, seed=idx), sr,
+                note
+            )
+        )
+        cases.append(
+            BenchCase(
+                f'{note} weak fundamental',
+                synth_tone(note, sr, fundamental=.1), sr, note
+            )
+        )
+    return cases
+
+
+def load_case(arg: str, sr: ty.Optional[int] = None) -> BenchCase:
+    """Load recorded tone from `path[:note]` argument.
+
+    Raises
+    ------
+    ValueError
+        If note is not given and not found in the file name, or is not a
+        valid note name.
+    """
+    path, _, note = arg.rpartition(':')
+    # no note, colon belongs to the path (e.g. Windows drive letter)
+    if not path or '/' in note or '\\' in note:
+        path, note = arg, ''
+    if not note:
+        found = re.findall(r'[A-G]#?\d', Path(path).stem)
+        if not found:
+            raise ValueError(f'can not get note from the file name: {path}')
+        note = found[-1]
+    try:
+        lr.note_to_hz(note)
+    except lr.ParameterError:
+        raise ValueError(f'invalid note "{note}" for {path}') from None
+    audio, file_sr = lr.load(path, sr=sr, mono=True)
+    return BenchCase(Path(path).name, audio, file_sr, note)
+
+
+def run_bench(
+    cases: ty.Iterable[BenchCase],
+    engines: ty.Iterable[PitchEngine],
+    min_note: str = 'C1',
+    max_note: str = 'C7',
+) -> ty.List[BenchResult]:
+    """Estimate root of every case by every engine.
+
+    Returns
+    -------
+    List[BenchResult]
+    """
+    engines = list(engines)
+    results: ty.List[BenchResult] = []
+    for case in cases:
+        for engine in engines:
+            start = time.perf_counter()
+            try:
+                note: ty.Optional[str] = engine.estimate_root(
+                    case.audio, case.sr, min_note, max_note
+                )
+            except PitchError:
+                note = None
+            results.append(
+                BenchResult(
+                    engine.name, case.name, case.note, note,
+                    time.perf_counter() - start
+                )
+            )
+    return results
+
+
+def summarize(results: ty.Iterable[BenchResult]) -> str:
+    """Make table of accuracy and runtime per engine."""
+    by_engine: ty.Dict[str, ty.List[BenchResult]] = {}
+    for result in results:
+        by_engine.setdefault(result.engine, []).append(result)
+    lines = [
+        '{:<10} {:>7} {:>7} {:>7} {:>7} {:>9}'.format(
+            'engine', 'tones', 'right', 'octave', 'wrong', 'ms/tone'
+        )
+    ]
+    for engine, group in by_engine.items():
+        errors = [res.semitones for res in group]
+        right = sum(err == 0 for err in errors)
+        octave = sum(err is not None and err != 0 and err % 12 == 0
+                     for err in errors)
+        lines.append(
+            '{:<10} {:>7} {:>7} {:>7} {:>7} {:>9.1f}'.format(
+                engine, len(group), right, octave,
+                len(group) - right - octave,
+                1000 * np.mean([res.seconds for res in group])
+            )
+        )
+    return '\n'.join(lines)
+
+
+def main(argv: ty.Optional[ty.List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog='python -m sample_editor.pitch_bench',
+        description='compare accuracy and speed of pitch engines'
+    )
+    parser.add_argument(
+        'files', nargs='*', help='recorded tones as path[:note]'
+    )
+    parser.add_argument(
+        '-e',
+        '--engines',
+        nargs='+',
+        choices=list(PITCH_ENGINES),
+        default=list(PITCH_ENGINES),
+    )
+    parser.add_argument(
+        '--sr', type=int, default=22050, help='samplerate of synthetic tones'
+    )
+    parser.add_argument(
+        '--no-synth', action='store_true', help='measure only the files'
+    )
+    parser.add_argument(
+        '-v', '--verbose', action='store_true', help='print every estimate'
+    )
+    args = parser.parse_args(argv)
+
+    cases = [] if args.no_synth else synthetic_cases(args.sr)
+    for arg in args.files:
+        try:
+            cases.append(load_case(arg))
+        except Exception as e:
+            print(f'skipping {arg}: {e}')
+    results = run_bench(cases, [PITCH_ENGINES[name] for name in args.engines])
+    if args.verbose:
+        for res in results:
+            print(
+                f'{res.engine:<10} {res.case:<28} {res.expected:>4} -> '
+                f'{res.note} ({1000 * res.seconds:.1f} ms)'
+            )
+    print(summarize(results))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,10 @@
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+import functools
+import multiprocessing as mp
+import os
 import typing as ty
+from warnings import warn
 
 import librosa as lr
 import numpy as np
@@ -7,10 +13,325 @@ from .tools import LengthUnit, length_convert, hz_to_note
 from .item_handler import ItemsHandler, ItemsError
 
 
+# librosa.pyin default, octaves per second
+MAX_TRANSITION_RATE = 35.92
+# seconds, longer audio is split for pYIN (see pyin_chunked)
+PYIN_CHUNK_SEC = 30.
+
+
 class PitchError(ItemsError):
     ...
 
 
+class F0Track(ty.NamedTuple):
+    """Output of librosa.pyin with parameters it was computed with."""
+
+    f0: np.ndarray
+    voiced_flag: np.ndarray
+    voiced_prob: np.ndarray
+    sr: int
+    frame_length: int
+    hop_length: int
+
+    def slice_frames(self, first: int, last: int) -> 'F0Track':
+        """Get track for the frames range as views."""
+        return self._replace(
+            f0=self.f0[first:last],
+            voiced_flag=self.voiced_flag[first:last],
+            voiced_prob=self.voiced_prob[first:last],
+        )
+
+
+def _compute_f0_track(
+    audio: np.ndarray,
+    sr: int,
+    fmin: float,
+    fmax: float,
+    frame_length: int,
+    win_length: ty.Optional[int],
+    hop_length: int,
+    max_transition_rate: float = MAX_TRANSITION_RATE,
+) -> F0Track:
+    f0s, v_flag, v_prob = pyin_chunked(
+        audio,
+        sr=sr,
+        fmin=fmin,
+        fmax=fmax,
+        frame_length=frame_length,
+        win_length=win_length,
+        hop_length=hop_length,
+        max_transition_rate=max_transition_rate,
+    )
+    return F0Track(f0s, v_flag, v_prob, sr, frame_length, hop_length)
+
+
+def _pyin_segment(
+    audio: np.ndarray, **params: ty.Any
+) -> ty.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    return lr.pyin(audio, **params)
+
+
+def pyin_chunked(
+    audio: np.ndarray,
+    sr: int,
+    fmin: float,
+    fmax: float,
+    frame_length: int = 2048,
+    win_length: ty.Optional[int] = None,
+    hop_length: ty.Optional[int] = None,
+    max_transition_rate: float = MAX_TRANSITION_RATE,
+    chunk_sec: float = PYIN_CHUNK_SEC,
+    overlap_sec: float = 1.,
+    workers: ty.Optional[int] = None,
+) -> ty.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """librosa.pyin over overlapping segments of long audio.
+
+    pYIN keeps matrices of (pitch bins, frames) in memory and runs on a
+    single core. Here every segment is decoded in a process pool, and
+    only its own frames are taken back: the overlap is dropped, so edge
+    padding and the Viterbi start of the segment do not affect the
+    result. Audio shorter than two chunks goes straight to librosa.pyin.
+
+    Note
+    ----
+    Inside a child process segments are decoded one by one, not to
+    spawn pools from the pool workers.
+
+    Parameters
+    ----------
+    audio : np.ndarray
+        mono
+    sr : int
+    fmin : float
+    fmax : float
+    frame_length : int, optional
+    win_length : Optional[int], optional
+        None = frame_length/2
+    hop_length : Optional[int], optional
+        None = frame_length/4
+    max_transition_rate : float, optional
+    chunk_sec : float, optional
+        length of segment without overlap
+    overlap_sec : float, optional
+        added to the both sides of segment
+    workers : Optional[int], optional
+        None means amount of CPUs
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray, np.ndarray]
+        f0, voiced_flag, voiced_prob as librosa.pyin returns them
+    """
+    if hop_length is None:
+        hop_length = frame_length // 4
+    params = dict(
+        fmin=fmin,
+        fmax=fmax,
+        sr=sr,
+        frame_length=frame_length,
+        win_length=win_length,
+        hop_length=hop_length,
+        max_transition_rate=max_transition_rate,
+    )
+    n_frames = 1 + len(audio) // hop_length
+    chunk = max(1, int(chunk_sec * sr / hop_length))
+    if n_frames < 2 * chunk:
+        return _pyin_segment(audio, **params)
+    overlap = int(np.ceil(overlap_sec * sr / hop_length))
+
+    # frames, segment starts with, and frames it owns
+    owned = [
+        (max(0, first - overlap), first, min(first + chunk, n_frames))
+        for first in range(0, n_frames, chunk)
+    ]
+    segments = [
+        audio[start * hop_length:(last + overlap) * hop_length]
+        for start, _, last in owned
+    ]
+    workers = workers or os.cpu_count() or 1
+    run = functools.partial(_pyin_segment, **params)
+    if workers == 1 or mp.parent_process() is not None:
+        results = list(map(run, segments))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(segments))
+        ) as executor:
+            results = list(executor.map(run, segments))
+    return ty.cast(
+        ty.Tuple[np.ndarray, np.ndarray, np.ndarray],
+        tuple(
+            np.concatenate(
+                [
+                    result[idx][first - start:last - start]
+                    for result, (start, first, last) in zip(results, owned)
+                ]
+            ) for idx in range(3)
+        )
+    )
+
+
+def note_range(
+    expected_note: str,
+    semitones: int,
+    min_note: str = 'C1',
+    max_note: str = 'C7',
+) -> ty.Tuple[str, str]:
+    """Get pitch range of semitones around the expected note.
+
+    Parameters
+    ----------
+    expected_note : str
+        clamped to min_note..max_note
+    semitones : int
+        how far from the expected note range goes in both directions
+    min_note : str, optional
+        range never goes below
+    max_note : str, optional
+        range never goes above
+
+    Returns
+    -------
+    Tuple[str, str]
+        min and max notes
+    """
+    low = lr.note_to_midi(min_note)
+    high = lr.note_to_midi(max_note)
+    midi = min(max(lr.note_to_midi(expected_note), low), high)
+    if midi - semitones <= low and midi + semitones >= high:
+        return min_note, max_note
+    return (
+        hz_to_note(lr.midi_to_hz(max(low, midi - semitones))),
+        hz_to_note(lr.midi_to_hz(min(high, midi + semitones))),
+    )
+
+
+def _widening_ranges(
+    expected_note: ty.Optional[str], semitones: int, min_note: str,
+    max_note: str
+) -> ty.Iterator[ty.Tuple[str, str]]:
+    """Yield ranges around expected note, doubling them up to the bounds."""
+    if expected_note is None:
+        yield min_note, max_note
+        return
+    while True:
+        low, high = note_range(expected_note, semitones, min_note, max_note)
+        yield low, high
+        if (low, high) == (min_note, max_note):
+            return
+        semitones *= 2
+
+
+def _transition_rate(
+    min_note: str, max_note: str, sr: int, hop_length: int
+) -> float:
+    """Get pYIN max_transition_rate, that fits into the notes range.
+
+    pYIN can not jump further than the whole range in one frame anyway,
+    and transition matrix wider than the range is rejected by librosa.
+    """
+    # pitch bins count is rounded down, so one semitone is kept aside
+    span = lr.note_to_midi(max_note) - lr.note_to_midi(min_note) - 1.25
+    return min(MAX_TRANSITION_RATE, max(span, 0.) * sr / (12 * hop_length))
+
+
+def _voicing_collapsed(
+    f0: np.ndarray, voiced_flag: np.ndarray, min_note: ty.Optional[str],
+    max_note: ty.Optional[str], min_voiced: float
+) -> bool:
+    """Check if pYIN lost the pitch, because it is out of the range.
+
+    Either too few frames are voiced, or pitch sticks to the range edge.
+    Edge, which is None (not narrowed), is not checked: real pitch can
+    lay there.
+    """
+    if not len(voiced_flag) or voiced_flag.mean() < min_voiced:
+        return True
+    median = np.median(f0[voiced_flag])
+    semitone = 2**(1 / 12)
+    return bool(
+        min_note is not None and median < lr.note_to_hz(min_note) * semitone
+        or
+        max_note is not None and median > lr.note_to_hz(max_note) / semitone
+    )
+
+
+def _range_failure(
+    audio: np.ndarray, sr: int, f0: np.ndarray, voiced_flag: np.ndarray,
+    low: str, high: str, min_note: str, max_note: str, min_voiced: float
+) -> ty.Tuple[ty.Optional[str], bool]:
+    """Check pitch, found in the range narrowed from min_note — max_note.
+
+    Returns
+    -------
+    Tuple[Optional[str], bool]
+        reason not to trust the pitch (None if trusted), and whether it's
+        octave error: narrow range around expected note an octave off
+        lets pYIN confirm subharmonic (or harmonic), so the range is not
+        widened then, but replaced by the whole one.
+    """
+    if (low, high) == (min_note, max_note):
+        return None, False
+    if _voicing_collapsed(
+        f0, voiced_flag, None if low == min_note else low,
+        None if high == max_note else high, min_voiced
+    ):
+        return f'pitch is lost in range {low} — {high}', False
+    note = hz_to_note(float(np.median(f0[voiced_flag])))
+    match = verify_root(audio, sr, note, offsets=(-12, 0, 12))
+    if lr.note_to_midi(match.note) != lr.note_to_midi(note):
+        return (
+            f'{note} found in range {low} — {high}, '
+            f'but harmonics prefer {match.note}'
+        ), True
+    return None, False
+
+
+def get_f0_track(
+    items_handler: ItemsHandler,
+    min_note: str = 'C1',
+    max_note: str = 'C7',
+    frame_length: int = 2048,
+    win_length: ty.Optional[int] = None,
+    hop_length: ty.Optional[int] = None,
+) -> F0Track:
+    """Get pYIN track of the entire items audio, computing it only once.
+
+    Track is kept in the items handler feature cache, so every further
+    query with the same parameters is an index lookup.
+
+    Parameters
+    ----------
+    items_handler : ItemsHandler
+    min_note : str, optional
+    max_note : str, optional
+    frame_length : int, optional
+        in samples
+    win_length : Optional[int], optional
+        in samples, None = frame_length/2
+    hop_length : Optional[int], optional
+        in samples, None = frame_length/4
+
+    Returns
+    -------
+    F0Track
+    """
+    if hop_length is None:
+        hop_length = frame_length // 4
+    return items_handler.get_feature(
+        'pyin',
+        _compute_f0_track,
+        sr=items_handler.sr,
+        fmin=lr.note_to_hz(min_note),
+        fmax=lr.note_to_hz(max_note),
+        frame_length=int(frame_length),
+        win_length=None if win_length is None else int(win_length),
+        hop_length=int(hop_length),
+        max_transition_rate=_transition_rate(
+            min_note, max_note, items_handler.sr, int(hop_length)
+        ),
+    )
+
+
 def estimate_entire_root(
     audio: np.array,
     sr: int,
@@ -18,10 +339,21 @@ def estimate_entire_root(
     max_note: str = 'C7',
     frame_length: float = 4096,
     win_length: ty.Optional[float] = None,
-    length_units: LengthUnit = LengthUnit.samples
+    length_units: LengthUnit = LengthUnit.samples,
+    expected_note: ty.Optional[str] = None,
+    semitones: int = 3,
+    min_voiced: float = .25,
 ) -> str:
     """Get root note of the entire audio array.
 
+    If expected note is given (e.g. root of the previous note in
+    chromatic run), pYIN searches only semitones around it: Viterbi
+    decoding cost grows with the amount of pitch bins. If voicing
+    collapses inside the narrow range, range is doubled until it reaches
+    min_note — max_note. Expected note is only a prior: if harmonics of
+    the found pitch prefer another octave (see `verify_root`), the whole
+    range is searched.
+
     Parameters
     ----------
     audio : np.array
@@ -36,6 +368,12 @@ def estimate_entire_root(
         Samples by default, None = frame_length/2
     length_units : LengthUnit, optional
         can be samples or ms
+    expected_note : Optional[str], optional
+        None means search in the whole min_note — max_note range
+    semitones : int, optional
+        initial range around expected_note
+    min_voiced : float, optional
+        the least fraction of voiced frames, pitch is trusted with
 
     Returns
     -------
@@ -52,19 +390,405 @@ def estimate_entire_root(
                 win_length, sr, LengthUnit.samples, LengthUnit.ms
             )
 
-    f0s, v_flag, v_prob = lr.pyin(
-        audio,
-        fmin=lr.note_to_hz(min_note),
-        fmax=lr.note_to_hz(max_note),
-        sr=sr,
-        win_length=None if win_length is None else win_length,
-        frame_length=frame_length,
+    median = _pyin_median(
+        audio, sr, min_note, max_note, int(frame_length),
+        None if win_length is None else int(win_length), expected_note,
+        semitones, min_voiced
     )
+    return hz_to_note(median)
+
+
+def _pyin_median(
+    audio: np.ndarray,
+    sr: int,
+    min_note: str,
+    max_note: str,
+    frame_length: int,
+    win_length: ty.Optional[int],
+    expected_note: ty.Optional[str],
+    semitones: int,
+    min_voiced: float,
+    chunk_sec: float = PYIN_CHUNK_SEC,
+) -> float:
+    """Get median pYIN f0, widening range around the expected note."""
+
+    def run(low: str,
+            high: str) -> ty.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return pyin_chunked(
+            audio,
+            fmin=lr.note_to_hz(low),
+            fmax=lr.note_to_hz(high),
+            sr=sr,
+            win_length=win_length,
+            frame_length=frame_length,
+            max_transition_rate=_transition_rate(
+                low, high, sr, frame_length // 4
+            ),
+            chunk_sec=chunk_sec,
+        )
+
+    for low, high in _widening_ranges(
+        expected_note, semitones, min_note, max_note
+    ):
+        f0s, v_flag, v_prob = run(low, high)
+        failure, octave = _range_failure(
+            audio, sr, f0s, v_flag, low, high, min_note, max_note,
+            min_voiced
+        )
+        if failure is None:
+            break
+        warn(failure)
+        if octave:
+            f0s, v_flag, v_prob = run(min_note, max_note)
+            break
 
     clean = f0s[np.logical_not(~v_flag)]
     # print(list(hz_to_note(f0) for f0 in clean))
-    median = ty.cast(float, np.median(clean))
-    return hz_to_note(median)
+    return ty.cast(float, np.median(clean))
+
+
+class RootMatch(ty.NamedTuple):
+    """Output of `verify_root`.
+
+    Attributes
+    ----------
+    note : str
+    confidence : float
+        0 — candidate notes are indistinguishable, 1 — the others have no
+        harmonic energy at all
+    harmonicity : float
+        share of the note harmonics in the measured spectral energy
+    """
+
+    note: str
+    confidence: float
+    harmonicity: float
+
+
+def _sustain_frames(
+    audio: np.ndarray, frame_length: int, n_frames: int
+) -> np.ndarray:
+    """Get the loudest frames of audio, shape (frames, frame_length)."""
+    if len(audio) < frame_length:
+        audio = np.pad(audio, (0, frame_length - len(audio)))
+    frames = lr.util.frame(
+        audio, frame_length=frame_length, hop_length=frame_length // 2
+    )
+    energy = np.einsum('ij,ij->j', frames, frames)
+    loudest = np.sort(np.argsort(energy)[-n_frames:])
+    return frames[:, loudest].T
+
+
+def verify_root(
+    audio: np.ndarray,
+    sr: int,
+    expected_note: str,
+    offsets: ty.Sequence[int] = (-12, -2, -1, 0, 1, 2, 12),
+    n_frames: int = 6,
+    periods: int = 16,
+    n_harmonics: int = 8,
+    cents: ty.Sequence[float] = (-30., -15., 0., 15., 30.),
+) -> RootMatch:
+    """Score notes around the expected one by their harmonics.
+
+    Only a few loudest frames are analysed, and only at the frequencies of
+    candidate harmonics and between them (zero-padded spectrum is read at
+    the needed frequencies, like with bank of Goertzel filters). Candidate
+    score is energy of its harmonics relative to the best candidate,
+    weighted by their share against energy in between, and lowered if the
+    odd harmonics are missing. So the octave above loses the odd
+    harmonics, and the octave below is found subharmonic.
+
+    It takes milliseconds, and is meant to confirm known root or to catch
+    octave error, falling back to `estimate_entire_root` if confidence is
+    low.
+
+    Parameters
+    ----------
+    audio : np.ndarray
+        mono
+    sr : int
+    expected_note : str
+    offsets : Sequence[int], optional
+        candidates, in semitones from the expected note
+    n_frames : int, optional
+        amount of the loudest frames to analyse
+    periods : int, optional
+        frame length in periods of the expected note
+    n_harmonics : int, optional
+    cents : Sequence[float], optional
+        detune of candidates, the best one is taken (instrument can be out
+        of tune a bit)
+
+    Returns
+    -------
+    RootMatch
+    """
+    midi = lr.note_to_midi(expected_note) + np.asarray(offsets)
+    f0s = lr.midi_to_hz(midi)
+    frame_length = max(
+        min(int(periods * sr / lr.note_to_hz(expected_note)), len(audio)), 2
+    )
+    frames = _sustain_frames(audio, frame_length, n_frames)
+    frames = frames * np.hanning(frame_length)
+    # zero padding makes reading of the spectrum at any frequency precise
+    n_fft = 4 * 2**int(np.ceil(np.log2(frame_length)))
+    spectrum = (np.abs(np.fft.rfft(frames, n=n_fft, axis=1))**2).sum(axis=0)
+
+    # (candidates, cents, harmonics): harmonic and in-between frequencies
+    detuned = f0s[:, None] * 2**(np.asarray(cents) / 1200)
+    steps = np.arange(1, n_harmonics + 1)
+    harm = detuned[..., None] * steps
+    between = detuned[..., None] * (steps - .5)
+    freqs = np.stack((harm, between))
+    power = np.interp(
+        freqs * n_fft / sr, np.arange(len(spectrum)), spectrum, right=0.
+    )
+    harm_power, between_power = power.sum(axis=-1)
+    odd_power = power[0, ..., ::2].sum(axis=-1)
+    harmonicity = harm_power / np.maximum(harm_power + between_power, 1e-20)
+    # subharmonic has the same harmonics, but odd of them are empty
+    odd_share = odd_power / np.maximum(harm_power, 1e-20)
+    # mistuned candidate catches only leakage of the real harmonics
+    salience = harm_power / max(harm_power.max(), 1e-20)
+    scores = salience * harmonicity * np.minimum(1., 2 * odd_share)
+    best_tune = scores.argmax(axis=1)
+    scores = scores[np.arange(len(f0s)), best_tune]
+
+    order = np.argsort(scores)[::-1]
+    best, second = scores[order[0]], scores[order[1]]
+    confidence = 1 - second / best if best > 0 else 0.
+    return RootMatch(
+        hz_to_note(f0s[order[0]]), float(confidence),
+        float(harmonicity[order[0], best_tune[order[0]]])
+    )
+
+
+class PitchEngine(ABC):
+    """Root estimation algorithm.
+
+    Engines are registered in `PITCH_ENGINES` by name, so articulation
+    can pick the one, that fits its material best (see `pitch_bench` for
+    measuring accuracy and speed).
+
+    Attributes
+    ----------
+    name : str
+        key in `PITCH_ENGINES`
+    """
+
+    name: str
+
+    @abstractmethod
+    def estimate_f0(
+        self,
+        audio: np.ndarray,
+        sr: int,
+        min_note: str = 'C1',
+        max_note: str = 'C7',
+        expected_note: ty.Optional[str] = None,
+    ) -> float:
+        """Get f0 of the entire audio.
+
+        Parameters
+        ----------
+        audio : np.ndarray
+            mono
+        sr : int
+        min_note : str, optional
+        max_note : str, optional
+        expected_note : Optional[str], optional
+            engine may use it to narrow the search
+
+        Returns
+        -------
+        float
+            Hz, nan if no pitch found
+        """
+        ...
+
+    def estimate_root(
+        self,
+        audio: np.ndarray,
+        sr: int,
+        min_note: str = 'C1',
+        max_note: str = 'C7',
+        expected_note: ty.Optional[str] = None,
+    ) -> str:
+        """Get root note of the entire audio.
+
+        Raises
+        ------
+        PitchError
+            If no pitch found.
+        """
+        f0 = self.estimate_f0(audio, sr, min_note, max_note, expected_note)
+        if not np.isfinite(f0) or f0 <= 0:
+            raise PitchError(f'{self.name} has not found any pitch')
+        return hz_to_note(f0)
+
+
+class PyinEngine(PitchEngine):
+    """librosa.pyin over the entire audio, like `estimate_entire_root`.
+
+    The most robust, but the slowest. Range is narrowed around the
+    expected note, if given. Long audio is decoded by chunks in parallel
+    (see `pyin_chunked`).
+    """
+
+    name = 'pyin'
+
+    def __init__(
+        self,
+        frame_length: int = 4096,
+        semitones: int = 3,
+        min_voiced: float = .25,
+        chunk_sec: float = PYIN_CHUNK_SEC,
+    ) -> None:
+        self.frame_length = frame_length
+        self.semitones = semitones
+        self.min_voiced = min_voiced
+        self.chunk_sec = chunk_sec
+
+    def estimate_f0(
+        self,
+        audio: np.ndarray,
+        sr: int,
+        min_note: str = 'C1',
+        max_note: str = 'C7',
+        expected_note: ty.Optional[str] = None,
+    ) -> float:
+        return _pyin_median(
+            audio, sr, min_note, max_note, self.frame_length, None,
+            expected_note, self.semitones, self.min_voiced, self.chunk_sec
+        )
+
+
+class YinEngine(PitchEngine):
+    """librosa.yin over frames not quieter than top_db below the peak.
+
+    No Viterbi decoding, so much faster than pYIN, but prone to octave
+    errors on weak fundamental.
+    """
+
+    name = 'yin'
+
+    def __init__(
+        self,
+        frame_length: int = 4096,
+        trough_threshold: float = .1,
+        top_db: float = 12.
+    ) -> None:
+        self.frame_length = frame_length
+        self.trough_threshold = trough_threshold
+        self.top_db = top_db
+
+    def estimate_f0(
+        self,
+        audio: np.ndarray,
+        sr: int,
+        min_note: str = 'C1',
+        max_note: str = 'C7',
+        expected_note: ty.Optional[str] = None,
+    ) -> float:
+        frame_length = min(self.frame_length, len(audio))
+        f0s = lr.yin(
+            audio,
+            fmin=lr.note_to_hz(min_note),
+            fmax=lr.note_to_hz(max_note),
+            sr=sr,
+            frame_length=frame_length,
+            trough_threshold=self.trough_threshold,
+        )
+        rms = lr.feature.rms(
+            y=audio, frame_length=frame_length, hop_length=frame_length // 4
+        )[0]
+        loud = lr.amplitude_to_db(rms, ref=np.max) > -self.top_db
+        return float(np.median(f0s[loud[:len(f0s)]]))
+
+
+class AutocorrEngine(PitchEngine):
+    """Autocorrelation of the few loudest (sustain) frames.
+
+    The first autocorrelation peak close to the highest one is taken,
+    which avoids choosing multiple of the period. Frame is enlarged to
+    hold three periods of min_note.
+    """
+
+    name = 'autocorr'
+
+    def __init__(
+        self,
+        frame_length: int = 4096,
+        n_frames: int = 6,
+        peak_ratio: float = .9
+    ) -> None:
+        self.frame_length = frame_length
+        self.n_frames = n_frames
+        self.peak_ratio = peak_ratio
+
+    def estimate_f0(
+        self,
+        audio: np.ndarray,
+        sr: int,
+        min_note: str = 'C1',
+        max_note: str = 'C7',
+        expected_note: ty.Optional[str] = None,
+    ) -> float:
+        min_lag = max(int(sr / lr.note_to_hz(max_note)), 1)
+        max_lag = int(np.ceil(sr / lr.note_to_hz(min_note)))
+        frame_length = max(
+            min(max(self.frame_length, 3 * max_lag), len(audio)), 2
+        )
+        max_lag = min(max_lag, frame_length // 2)
+        if max_lag <= min_lag + 2:
+            return np.nan
+        frames = _sustain_frames(audio, frame_length, self.n_frames)
+        frames = frames - frames.mean(axis=1, keepdims=True)
+        spectrum = np.fft.rfft(frames, n=2 * frame_length, axis=1)
+        acf = np.fft.irfft(np.abs(spectrum)**2, axis=1)[:, :max_lag + 2]
+        # unbiased and normalized
+        acf = acf / (frame_length - np.arange(max_lag + 2))
+        acf = acf / np.maximum(acf[:, :1], 1e-20)
+
+        f0s = []
+        for curve in acf:
+            lags = np.arange(min_lag, max_lag + 1)
+            peaks = lags[(curve[lags] > curve[lags - 1]) &
+                         (curve[lags] >= curve[lags + 1])]
+            if not len(peaks) or curve[peaks].max() <= 0:
+                continue
+            lag = peaks[np.argmax(
+                curve[peaks] >= self.peak_ratio * curve[peaks].max()
+            )]
+            # parabolic interpolation
+            left, mid, right = curve[lag - 1:lag + 2]
+            denom = left - 2 * mid + right
+            shift = .5 * (left - right) / denom if denom else 0.
+            f0s.append(sr / (lag + shift))
+        return float(np.median(f0s)) if f0s else np.nan
+
+
+PITCH_ENGINES: ty.Dict[str, PitchEngine] = {
+    engine.name: engine
+    for engine in (PyinEngine(), YinEngine(), AutocorrEngine())
+}
+
+
+def register_pitch_engine(engine: PitchEngine) -> PitchEngine:
+    """Make engine available in `PITCH_ENGINES` by its name.
+
+    Parameters
+    ----------
+    engine : PitchEngine
+
+    Returns
+    -------
+    PitchEngine
+        the same engine
+    """
+    PITCH_ENGINES[engine.name] = engine
+    return engine
 
 
 def get_first_null_f0(
@@ -77,9 +801,53 @@ def get_first_null_f0(
     frame_length: float = 2048,
     win_length: ty.Optional[float] = None,
     offset_units: LengthUnit = LengthUnit.ms,
-    length_units: LengthUnit = LengthUnit.samples
+    length_units: LengthUnit = LengthUnit.samples,
+    expected_note: ty.Optional[str] = None,
+    semitones: int = 3,
+    min_voiced: float = .25,
 ) -> float:
-    audio = items_handler.load_audio()[0]
+    """Get the first unvoiced place after start_offset and min_duration.
+
+    Note
+    ----
+    pYIN runs once for the entire items audio (see `get_f0_track`),
+    every call is just a lookup in the cached track. With expected_note
+    the track is computed in the narrow range around it, and widened
+    like in `estimate_entire_root`.
+
+    Parameters
+    ----------
+    items_handler : ItemsHandler
+    start_offset : float
+    min_duration : float
+        the least voiced length after start_offset
+    end_offset : Optional[float], optional
+        where to stop looking
+    min_note : str, optional
+    max_note : str, optional
+    frame_length : float, optional
+    win_length : Optional[float], optional
+    offset_units : LengthUnit, optional
+        units of start_offset, min_duration and end_offset
+    length_units : LengthUnit, optional
+        units of frame_length and win_length
+    expected_note : Optional[str], optional
+        None means search in the whole min_note — max_note range
+    semitones : int, optional
+        initial range around expected_note
+    min_voiced : float, optional
+        the least fraction of voiced frames, pitch is trusted with
+
+    Returns
+    -------
+    float
+        offset in offset_units
+
+    Raises
+    ------
+    PitchError
+        If no unvoiced frame found after the 5th frame.
+    """
     sr = items_handler.sr
 
     if length_units != LengthUnit.samples:
@@ -94,19 +862,43 @@ def get_first_null_f0(
                 win_length, sr, length_units, LengthUnit.samples
             )
     hop_length = int(frame_length // 4)
+
+    def run(low: str, high: str) -> F0Track:
+        return get_f0_track(
+            items_handler,
+            min_note=low,
+            max_note=high,
+            frame_length=int(frame_length),
+            win_length=None if win_length is None else int(win_length),
+            hop_length=hop_length,
+        )
+
+    for low, high in _widening_ranges(
+        expected_note, semitones, min_note, max_note
+    ):
+        track = run(low, high)
+        failure, octave = _range_failure(
+            items_handler.load_audio()[0], sr, track.f0,  # type:ignore
+            track.voiced_flag, low, high, min_note, max_note, min_voiced
+        )
+        if failure is None:
+            break
+        warn(failure)
+        if octave:
+            track = run(min_note, max_note)
+            break
     start_offset_int = ty.cast(
         int,
         length_convert(start_offset, sr, offset_units, LengthUnit.samples)
     )
-
-    if start_offset_int:
-        audio = audio[start_offset_int:]  # type:ignore
+    first = int(round(start_offset_int / hop_length))
+    last = len(track.voiced_flag)
     if end_offset:
         end_offset_int = ty.cast(
             int,
             length_convert(end_offset, sr, offset_units, LengthUnit.samples)
         )
-        audio = audio[:end_offset_int - start_offset_int]  # type:ignore
+        last = min(last, int(round(end_offset_int / hop_length)))
     min_duration_frms = length_convert(
         min_duration,
         sr,
@@ -114,33 +906,25 @@ def get_first_null_f0(
         LengthUnit.frames,
         hop_length=hop_length
     )
-    fmin, fmax = lr.note_to_hz(min_note), lr.note_to_hz(max_note)
-    f0s, v_flag, v_prob = lr.pyin(
-        audio,
-        fmin=fmin,
-        fmax=fmax,
-        sr=sr,
-        win_length=None if win_length is None else win_length,
-        frame_length=frame_length,
+    unvoiced = ~track.voiced_flag[first:last]
+    # two unvoiced frames in a row, not earlier than min_duration
+    candidates = (
+        unvoiced[:-1] & unvoiced[1:] &
+        (np.arange(len(unvoiced) - 1) >= min_duration_frms)
     )
-    # print(list(zip(f0s, v_flag)))
-    nulls = np.where(~v_flag)
-    # print(nulls)
-    for idx, val in enumerate(nulls[0]):
-        # print(val)
-        if val >= min_duration_frms:
-            # print(val, v_flag[val + 1])
-            if v_flag[val + 1]:
-                # print(f'skipping {val}')
-                continue
-            break
+    if candidates.any():
+        val = int(np.argmax(candidates))
+    elif unvoiced.any():
+        val = int(len(unvoiced) - 1 - np.argmax(unvoiced[::-1]))
+    else:
+        val = 0
 
     if val < 5:
         raise PitchError(
-            f'Cannot find null f0 at the reasonable frame (>=5): {v_flag}'
+            'Cannot find null f0 at the reasonable frame (>=5): '
+            f'{track.voiced_flag[first:last]}'
         )
     val_normalized = length_convert(
         val, sr, LengthUnit.frames, offset_units, hop_length=hop_length
     )
-    # print(val_normalized, )
-    return start_offset + val_normalized
\ No newline at end of file
+    return start_offset + val_normalized
@@ -71,5 +71,11 @@ from sample_editor import gui
 # plt.vlines(times[backtrack], env.min(), env.max(), color='y')
 # plt.show()
 
+# # streamed mixdown of mics with different samplerates equals load_audio
+# ih = item_handler.ItemsHandler(sr=22050)
+# streamed = np.concatenate(list(ih.iter_blocks(65536)))
+# loaded = ih.load_audio()[0]
+# print(len(streamed), len(loaded), np.abs(streamed - loaded).max())
+
 theme = 'SandyBeach'
 gui.run(theme=theme)
@@ -11,7 +11,7 @@ from sample_editor.gui import (
 )
 from sample_editor.loudness import (
     get_rms, get_first_rms_value_ms, get_last_rms_value_ms, amplitude_to_db,
-    db_to_amplitude, detect_onsets
+    db_to_amplitude, detect_onsets, get_first_rms_values_ms, RmsQuery
 )
 from sample_editor.pitch_tracker import (
     estimate_entire_root, get_first_null_f0
@@ -507,12 +507,15 @@ class Shorts(BaseArt):
         handlers = ItemsHandler().split_by_items_gaps()
         export: ty.List[RegionContents] = []
         pprint(amount)
+        root: ty.Optional[str] = None
         for ih in handlers:
             wildcards_i = wildcards.copy()
             wildcards_i.update(
-                self.process_wildcards(tokens, items_handler=ih)
+                self.process_wildcards(
+                    tokens, items_handler=ih, expected_root=root
+                )
             )
-            root = self.get_root(wildcards_i, ih)
+            root = self.get_root(wildcards_i, ih, expected_root=root)
             if root not in amount:
                 amount[root] = []
 
@@ -580,20 +583,21 @@ class Shorts(BaseArt):
         )
         pre_onset_time = ty.cast(float, values[self.ns + 'pre_onset_time'])
         sample_bounds: ty.List[ty.Tuple[float, float]] = []
-        for idx, onset in enumerate(onsets):
-            st_ofst = onset - pre_onset_time
-            sh_left = get_first_rms_value_ms(
-                ih,
-                pre_silence,
-                start_offset=st_ofst,
-                end_offset=onset,
-                direction='left',
-                # want_marker='@start',
-                below=True,
-                want_trend=True,
-                hop_length_spl=256,
-            )
-
+        shifts_left = get_first_rms_values_ms(
+            ih,
+            [
+                RmsQuery(
+                    pre_silence,
+                    start_offset=onset - pre_onset_time,
+                    end_offset=onset,
+                    direction='left',
+                    below=True,
+                    want_trend=True,
+                ) for onset in onsets
+            ],
+            hop_length_spl=256,
+        )
+        for idx, (onset, sh_left) in enumerate(zip(onsets, shifts_left)):
             next_onset = (
                 bounds[1] if idx >= len(onsets) - 1 else onsets[idx + 1]
             )